@@ -92,4 +92,163 @@ def get_db_pass():
     # environment variables, inside constants
     # at the top of the script file.
     password = os.environ.get('DB_PASS')
-    return password 
\ No newline at end of file
+    return password
+
+
+def get_db_conn_max_age():
+    """ Retrieves how long, in seconds, a database connection is kept open
+
+    0 closes the connection at the end of each request and an empty value
+    keeps it open indefinitely.
+    """
+    max_age = os.environ.get('DB_CONN_MAX_AGE', 0)
+    if max_age == '':
+        return None
+    return int(max_age)
+
+
+def get_db_conn_health_checks():
+    """ Retrieves whether a persistent connection is checked before it is
+    reused by a new request
+    """
+    health_checks = os.environ.get('DB_CONN_HEALTH_CHECKS', '')
+    return health_checks.lower() in ('1', 'true', 'yes')
+
+
+def get_db_pool_options():
+    """ Retrieves the options of the in-process database connection pool
+
+    MAX_SIZE bounds the connections opened by each process, 0 disables the
+    pool. A request waits up to TIMEOUT seconds for a connection to be
+    returned once MAX_SIZE connections are in use.
+    """
+    options = {
+        'MAX_SIZE': int(os.environ.get('DB_POOL_MAX_SIZE', 0)),
+        'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 30)),
+    }
+    return options
+
+
+def use_async_read_views():
+    """ Checks whether the read actions of the APIs are served by async views
+
+    Only worthwhile under an ASGI server, whose entry point enables it.
+    """
+    async_read_views = os.environ.get('ASYNC_READ_VIEWS', '')
+    return async_read_views.lower() in ('1', 'true', 'yes')
+
+
+def get_openapi_schema_file():
+    """ Retrieves the path of a pregenerated OpenAPI schema, in JSON
+
+    The schema is generated on first use when unset or missing.
+    """
+    schema_file = os.environ.get('OPENAPI_SCHEMA_FILE') or None
+    return schema_file
+
+
+def use_fast_json():
+    """ Checks whether the APIs render and parse JSON with orjson
+
+    Enabled by default, the stdlib json module is used when orjson is not
+    installed either way.
+    """
+    fast_json = os.environ.get('API_FAST_JSON', 'true')
+    return fast_json.lower() in ('1', 'true', 'yes')
+
+
+def get_api_page_size():
+    """ Retrieves the default page size of the paginated API endpoints """
+    page_size = os.environ.get('API_PAGE_SIZE', 100)
+    return int(page_size)
+
+
+def get_cache_backend():
+    """ Retrieves the cache backend
+
+    The per-process memory cache is only suitable while a single process serves
+    the app, deployments running several workers must share a cache between
+    them (e.g. the database or memcached backends).
+    """
+    backend = os.environ.get(
+        'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+    )
+    return backend
+
+
+def get_cache_location():
+    """ Retrieves the cache location, whose meaning depends on the backend """
+    location = os.environ.get('CACHE_LOCATION', '')
+    return location
+
+
+def get_token_auth_cache_options():
+    """ Retrieves the options of the cached token authentication
+
+    MAX_SIZE and TTL (seconds) bound the in-process cache, CACHE_ALIAS names an
+    optional Django cache shared between processes whose entries live for
+    CACHE_TTL seconds.
+    """
+    options = {
+        'MAX_SIZE': int(os.environ.get('TOKEN_AUTH_CACHE_SIZE', 10000)),
+        'TTL': float(os.environ.get('TOKEN_AUTH_CACHE_TTL', 60)),
+        'CACHE_ALIAS': os.environ.get('TOKEN_AUTH_CACHE_ALIAS') or None,
+        'CACHE_TTL': float(os.environ.get('TOKEN_AUTH_SHARED_CACHE_TTL', 300)),
+    }
+    return options
+
+
+def get_signed_token_options():
+    """ Retrieves the options of the signed access and refresh tokens
+
+    ACCESS_TTL and REFRESH_TTL are their lifetimes, in seconds. Revoked tokens
+    are listed in the Django cache named by CACHE_ALIAS, which must be shared
+    by every process serving the app, like DJANGO_SECRET_KEY signing them.
+    """
+    options = {
+        'ACCESS_TTL': int(os.environ.get('SIGNED_TOKEN_ACCESS_TTL', 300)),
+        'REFRESH_TTL': int(os.environ.get('SIGNED_TOKEN_REFRESH_TTL', 86400)),
+        'CACHE_ALIAS': os.environ.get('SIGNED_TOKEN_CACHE_ALIAS', 'default'),
+    }
+    return options
+
+
+def get_throttle_options():
+    """ Retrieves the options of the token bucket throttles
+
+    Each scope refills its bucket at RATE requests per second, minute, hour or
+    day (e.g. '20/s') and holds up to BURST of them, an empty RATE disables it.
+    The buckets live in each process, up to MAX_KEYS of them, unless
+    CACHE_ALIAS names a Django cache shared by the workers.
+    """
+    options = {
+        'CACHE_ALIAS': os.environ.get('THROTTLE_CACHE_ALIAS') or None,
+        'MAX_KEYS': int(os.environ.get('THROTTLE_MAX_KEYS', 10000)),
+        'SCOPES': {
+            'recipes': {
+                'RATE': os.environ.get('THROTTLE_RECIPES_RATE', '20/s'),
+                'BURST': int(os.environ.get('THROTTLE_RECIPES_BURST', 100)),
+            },
+            'login': {
+                'RATE': os.environ.get('THROTTLE_LOGIN_RATE', '10/min'),
+                'BURST': int(os.environ.get('THROTTLE_LOGIN_BURST', 20)),
+            },
+        },
+    }
+    return options
+
+
+def get_password_hashing_options():
+    """ Retrieves the options of the pool hashing the passwords
+
+    WORKERS bounds the passwords hashed at once by each process, 0 hashes them
+    on the request thread instead. Up to QUEUE_SIZE more wait for a worker,
+    further ones are rejected with a 503 until the queue drains. Under gthread
+    the waiting requests hold their thread, WORKERS + QUEUE_SIZE should stay
+    below GUNICORN_THREADS so the other endpoints keep a thread.
+    """
+    options = {
+        'WORKERS': int(os.environ.get('PASSWORD_HASHING_WORKERS', 2)),
+        'QUEUE_SIZE': int(os.environ.get('PASSWORD_HASHING_QUEUE_SIZE', 1)),
+    }
+    return options
@@ -85,11 +85,25 @@ WSGI_APPLICATION = 'app.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.backends.postgresql',
         'HOST': get_db_host(),
         'NAME': get_db_name(),
         'USER': get_db_user(),
         'PASSWORD': get_db_pass(),
+        'CONN_MAX_AGE': get_db_conn_max_age(),
+        'CONN_HEALTH_CHECKS': get_db_conn_health_checks(),
+        'POOL': get_db_pool_options(),
+    }
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': get_cache_backend(),
+        'LOCATION': get_cache_location(),
     }
 }
 
@@ -112,6 +126,17 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Passwords hashed on a bounded pool of threads, see core.hashing. The pooled
+# hasher replaces PBKDF2PasswordHasher, both read and write pbkdf2_sha256 hashes.
+PASSWORD_HASHING = get_password_hashing_options()
+
+PASSWORD_HASHERS = [
+    'core.hashing.PooledPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/3.2/topics/i18n/
@@ -141,4 +166,37 @@ AUTH_USER_MODEL = 'core.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
-}
\ No newline at end of file
+    # NOTE: Only throttles the views with a throttle_scope, see THROTTLING.
+    'DEFAULT_THROTTLE_CLASSES': ['core.throttling.TokenBucketThrottle'],
+}
+
+# JSON rendered and parsed with orjson, see core.renderers. A view can still
+# pick its own with renderer_classes and parser_classes.
+if use_fast_json():
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = [
+        'core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ]
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'] = [
+        'core.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ]
+
+# OpenAPI schema served from memory, see core.schema
+OPENAPI_SCHEMA_FILE = get_openapi_schema_file()
+
+# Cached token authentication, see core.authentication
+TOKEN_AUTH_CACHE = get_token_auth_cache_options()
+
+# Signed access and refresh tokens, see core.signed_tokens
+SIGNED_TOKENS = get_signed_token_options()
+
+# Token bucket throttles by scope, see core.throttling
+THROTTLING = get_throttle_options()
+
+# Default page size of the paginated API list endpoints
+API_PAGE_SIZE = get_api_page_size()
+
+# Serve the read actions of the APIs with async views, see core.async_views
+ASYNC_READ_VIEWS = use_async_read_views()
@@ -0,0 +1,116 @@
+"""
+Benchmark of the recipe list served by a sync and an async view under ASGI.
+
+The requests are sent concurrently, in process, the way Django 3.2 serves them
+under ASGI: the sync view runs on the single thread shared by sync views, the
+async one is core.async_views.async_read_view. A delay added to every query
+stands in for a slow database. The async view opens a connection per request
+unless the connection pool is enabled, e.g. with DB_POOL_MAX_SIZE=20.
+
+Run from the app directory, it creates and removes a throwaway user:
+
+    python -m benchmarks.async_views --requests 200 --concurrency 20 --latency 20
+"""
+
+import argparse
+import asyncio
+import os
+import time
+import uuid
+from functools import update_wrapper
+
+import django
+
+LIST_URL = "/api/recipe/recipes/"
+
+
+def with_latency(view, latency):
+    """Return the view with latency seconds added to each of its queries."""
+    from django.db import connection
+
+    def delay(execute, sql, params, many, context):
+        time.sleep(latency)
+        return execute(sql, params, many, context)
+
+    def slow_view(request, *args, **kwargs):
+        with connection.execute_wrapper(delay):
+            return view(request, *args, **kwargs)
+
+    return update_wrapper(slow_view, view)
+
+
+async def run(view, factory, headers, requests, concurrency):
+    """Send the requests to the view and return the time they took."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send():
+        async with semaphore:
+            response = await view(factory.get(LIST_URL, **headers))
+            assert response.status_code == 200, response.status_code
+
+    start = time.perf_counter()
+    await asyncio.gather(*(send() for _ in range(requests)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=20, help="ms per query")
+    parser.add_argument("--recipes", type=int, default=50)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
+    # NOTE: Measures the views, not the recipe throttle.
+    os.environ["THROTTLE_RECIPES_RATE"] = ""
+    django.setup()
+    # NOTE: Allows the host of the requests built by the request factory.
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+
+    from asgiref.sync import sync_to_async
+    from core.async_views import async_read_view
+    from core.models import Recipe
+    from django.contrib.auth import get_user_model
+    from django.test import AsyncRequestFactory
+    from recipe.views import RecipeViewSet
+    from rest_framework.authtoken.models import Token
+
+    user = get_user_model().objects.create_user(
+        f"benchmark-{uuid.uuid4().hex}@example.com", uuid.uuid4().hex
+    )
+    try:
+        Recipe.objects.bulk_create(
+            Recipe(user=user, title=f"Recipe {i}", time_minutes=10, price="5.00")
+            for i in range(args.recipes)
+        )
+        token = Token.objects.create(user=user)
+        headers = {"authorization": f"Token {token.key}"}
+        view = with_latency(
+            RecipeViewSet.as_view({"get": "list"}), args.latency / 1000
+        )
+
+        def sync_view(request):
+            return view(request).render()
+
+        views = {
+            "sync": sync_to_async(sync_view, thread_sensitive=True),
+            "async": async_read_view(view),
+        }
+        factory = AsyncRequestFactory()
+        for name, mode_view in views.items():
+            elapsed = asyncio.run(
+                run(mode_view, factory, headers, args.requests, args.concurrency)
+            )
+            print(
+                f"{name:>5}: {args.requests} requests in {elapsed:.2f}s, "
+                f"{args.requests / elapsed:.1f} req/s"
+            )
+    finally:
+        user.delete()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark of DRF's JSON renderer and parser against the orjson ones.
+
+Renders and parses recipe lists shaped like the output of RecipeSerializer,
+once with the prices as strings (DRF's default) and once as Decimal objects,
+which go through the fallback encoder. No database is needed.
+
+Run from the app directory:
+
+    python -m benchmarks.json_renderers --recipes 1000 --repeat 50
+"""
+
+import argparse
+import io
+import os
+import timeit
+from decimal import Decimal
+
+import django
+
+
+def recipes(count, decimal_prices):
+    """Return count recipes as RecipeSerializer would represent them."""
+    return [
+        {
+            "id": i,
+            "title": f"Recipe number {i} with a longer title",
+            "time_minutes": i % 120,
+            "price": Decimal(i) / 4 if decimal_prices else f"{i / 4:.2f}",
+            "link": f"https://example.com/recipes/{i}",
+            "tags": [{"id": j, "name": f"Tag {j}"} for j in range(i % 4)],
+            "ingredients": [{"id": j, "name": f"Ingrédient {j}"} for j in range(5)],
+        }
+        for i in range(count)
+    ]
+
+
+def best_time(func, repeat):
+    """Return the fastest of repeat runs of func, in milliseconds."""
+    return min(timeit.repeat(func, number=1, repeat=repeat)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--recipes", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
+    django.setup()
+
+    from core.renderers import ORJSONParser, ORJSONRenderer
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+
+    pairs = {
+        "json": (JSONRenderer(), JSONParser()),
+        "orjson": (ORJSONRenderer(), ORJSONParser()),
+    }
+    for prices in ("string", "decimal"):
+        data = recipes(args.recipes, decimal_prices=prices == "decimal")
+        body = JSONRenderer().render(data)
+        print(f"{args.recipes} recipes, {prices} prices, {len(body) / 1024:.0f} KiB")
+        for name, (renderer, json_parser) in pairs.items():
+            render = best_time(lambda: renderer.render(data), args.repeat)
+            parse = best_time(
+                lambda: json_parser.parse(io.BytesIO(body)), args.repeat
+            )
+            print(f"  {name:>6}: render {render:7.2f}ms, parse {parse:7.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
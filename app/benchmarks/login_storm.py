@@ -0,0 +1,155 @@
+"""
+Benchmark of the recipe list latency during a storm of logins.
+
+A pool of threads stands in for a gthread worker and serves every request
+through the Django test client. While storm clients keep posting to the token
+endpoint, a probe client times requests to the recipe list, with:
+
+- idle: no storm, the baseline.
+- inline: passwords hashed on the request threads, as before core.hashing.
+- pool: passwords hashed on the bounded pool of core.hashing.
+
+Run from the app directory, it creates and removes a throwaway user:
+
+    python -m benchmarks.login_storm --threads 4 --storm 16 --probes 50
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+
+LIST_URL = "/api/recipe/recipes/"
+TOKEN_URL = "/api/user/token/"
+
+
+def storm(executor, credentials, stop, statuses):
+    """Post logins through the executor until stop is set."""
+    from django.test import Client
+
+    client = Client()
+
+    def login():
+        return client.post(TOKEN_URL, credentials).status_code
+
+    while not stop.is_set():
+        statuses[executor.submit(login).result()] += 1
+
+
+def probe(executor, headers, count):
+    """Return the latency of count recipe list requests, in milliseconds."""
+    from django.test import Client
+
+    client = Client()
+
+    def get_list():
+        response = client.get(LIST_URL, **headers)
+        assert response.status_code == 200, response.status_code
+
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        executor.submit(get_list).result()
+        latencies.append((time.perf_counter() - start) * 1000)
+        time.sleep(0.01)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=4, help="request threads")
+    parser.add_argument("--storm", type=int, default=16, help="login clients")
+    parser.add_argument("--probes", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=2, help="hashing workers")
+    parser.add_argument("--queue-size", type=int, default=1)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
+    # NOTE: The storm measures the hashing pool, not the throttles.
+    os.environ["THROTTLE_LOGIN_RATE"] = ""
+    os.environ["THROTTLE_RECIPES_RATE"] = ""
+    django.setup()
+    # NOTE: Allows the host of the requests sent by the test client.
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    # NOTE: Every rejected login would be logged as a 503.
+    logging.getLogger("django.request").setLevel(logging.CRITICAL)
+    logging.getLogger("core.hashing").setLevel(logging.ERROR)
+
+    import core.hashing
+    from core.hashing import HashingPool
+    from core.models import Recipe
+    from django.contrib.auth import get_user_model
+    from rest_framework.authtoken.models import Token
+
+    email = f"benchmark-{uuid.uuid4().hex}@example.com"
+    password = uuid.uuid4().hex
+    user = get_user_model().objects.create_user(email, password)
+    try:
+        Recipe.objects.bulk_create(
+            Recipe(user=user, title=f"Recipe {i}", time_minutes=10, price="5.00")
+            for i in range(20)
+        )
+        token = Token.objects.create(user=user)
+        headers = {"HTTP_AUTHORIZATION": f"Token {token.key}"}
+        credentials = {"email": email, "password": password}
+
+        modes = {
+            "idle": (HashingPool(0, 0), 0),
+            "inline": (HashingPool(0, 0), args.storm),
+            "pool": (HashingPool(args.workers, args.queue_size), args.storm),
+        }
+        for name, (pool, storm_clients) in modes.items():
+            core.hashing._pool = pool
+            stop = threading.Event()
+            statuses = Counter()
+            executor = ThreadPoolExecutor(args.threads)
+            clients = [
+                threading.Thread(
+                    target=storm, args=(executor, credentials, stop, statuses)
+                )
+                for _ in range(storm_clients)
+            ]
+            for client in clients:
+                client.start()
+            # NOTE: Lets the storm fill the request threads before probing.
+            time.sleep(0.5 if storm_clients else 0)
+            start = time.perf_counter()
+            latencies = probe(executor, headers, args.probes)
+            elapsed = time.perf_counter() - start
+            stop.set()
+            for client in clients:
+                client.join()
+            executor.shutdown()
+
+            quantiles = statistics.quantiles(latencies, n=20)
+            logins = ", ".join(
+                f"{status}: {count / elapsed:.1f}/s"
+                for status, count in sorted(statuses.items())
+            )
+            print(
+                f"{name:>6}: recipe list p50 {statistics.median(latencies):7.1f}ms, "
+                f"p95 {quantiles[18]:7.1f}ms; logins {logins or '-'}"
+            )
+            if pool.workers:
+                stats = pool.stats()
+                print(
+                    f"        pool: {stats['completed']} hashed, "
+                    f"{stats['rejected']} rejected, "
+                    f"max wait {stats['wait_seconds_max'] * 1000:.1f}ms"
+                )
+    finally:
+        core.hashing._pool = None
+        user.delete()
+
+
+if __name__ == "__main__":
+    main()
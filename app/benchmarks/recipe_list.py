@@ -0,0 +1,121 @@
+"""
+Benchmark of the recipe list representation, RecipeSerializer against the
+values() rows of RecipeValuesSerializer.
+
+Times the queries and the representation of a list of recipes, each with a few
+tags and ingredients, both together and the representation alone.
+
+Run from the app directory, it creates and removes a throwaway user:
+
+    python -m benchmarks.recipe_list --recipes 1000 --repeat 20
+"""
+
+import argparse
+import os
+import timeit
+import uuid
+from decimal import Decimal
+
+import django
+
+
+def best_time(func, repeat):
+    """Return the fastest of repeat runs of func, in milliseconds."""
+    return min(timeit.repeat(func, number=1, repeat=repeat)) * 1000
+
+
+def create_recipes(user, count):
+    """Create count recipes for user, with 3 tags and 5 ingredients each."""
+    from core.models import Ingredient, Recipe, Tag
+
+    tags = Tag.objects.bulk_create(
+        Tag(user=user, name=f"Tag {i}") for i in range(10)
+    )
+    ingredients = Ingredient.objects.bulk_create(
+        Ingredient(user=user, name=f"Ingredient {i}") for i in range(20)
+    )
+    recipes = Recipe.objects.bulk_create(
+        Recipe(
+            user=user,
+            title=f"Recipe number {i}",
+            time_minutes=i % 120,
+            price=Decimal(i % 400) / 4,
+            link=f"https://example.com/recipes/{i}",
+        )
+        for i in range(count)
+    )
+    Recipe.tags.through.objects.bulk_create(
+        Recipe.tags.through(recipe=recipe, tag=tags[(i + j) % len(tags)])
+        for i, recipe in enumerate(recipes)
+        for j in range(3)
+    )
+    Recipe.ingredients.through.objects.bulk_create(
+        Recipe.ingredients.through(
+            recipe=recipe, ingredient=ingredients[(i + j) % len(ingredients)]
+        )
+        for i, recipe in enumerate(recipes)
+        for j in range(5)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--recipes", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
+    django.setup()
+
+    from core.models import Ingredient, Recipe, Tag
+    from django.contrib.auth import get_user_model
+    from django.db.models import Prefetch
+    from recipe.serializers import RecipeSerializer, RecipeValuesSerializer
+
+    user = get_user_model().objects.create_user(
+        f"benchmark-{uuid.uuid4().hex}@example.com", uuid.uuid4().hex
+    )
+    try:
+        create_recipes(user, args.recipes)
+        recipes = Recipe.objects.filter(user=user).order_by("-id")
+        instances = recipes.prefetch_related(
+            Prefetch("tags", queryset=Tag.objects.order_by("id")),
+            Prefetch("ingredients", queryset=Ingredient.objects.order_by("id")),
+        )
+        rows = recipes.values(*RecipeValuesSerializer.fields)
+
+        loaded_instances = list(instances)
+        loaded_rows = list(rows)
+        related = {
+            field_name: RecipeValuesSerializer.get_related(
+                field_name, [row["id"] for row in loaded_rows]
+            )
+            for field_name in RecipeValuesSerializer.related_fields
+        }
+        child = RecipeValuesSerializer()
+        assert RecipeSerializer(loaded_instances, many=True).data == [
+            child.to_representation(row, related) for row in loaded_rows
+        ]
+
+        timings = {
+            "serializer": (
+                lambda: RecipeSerializer(list(instances.all()), many=True).data,
+                lambda: RecipeSerializer(loaded_instances, many=True).data,
+            ),
+            "values": (
+                lambda: RecipeValuesSerializer(list(rows.all()), many=True).data,
+                lambda: [child.to_representation(row, related) for row in loaded_rows],
+            ),
+        }
+        print(f"{args.recipes} recipes")
+        for name, (total, representation) in timings.items():
+            print(
+                f"  {name:>10}: total {best_time(total, args.repeat):8.2f}ms, "
+                f"representation {best_time(representation, args.repeat):8.2f}ms"
+            )
+    finally:
+        user.delete()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Async views serving the read actions of DRF viewsets, and slow views, under ASGI
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, update_wrapper
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.urls import URLPattern
+
+READ_ACTIONS = ("list", "retrieve")
+
+
+def _run_view(view, request, *args, **kwargs):
+    """Run a request in a worker thread, releasing its database connection."""
+    # NOTE: Worker threads hold their own database connection, which is released
+    # here as request_started and request_finished would for a sync request.
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        # NOTE: Rendering serializes the data, which would otherwise happen on
+        # the thread shared by every sync request.
+        if not response.is_rendered:
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def async_read_view(view):
+    """
+    Wrap a DRF viewset view into an async view.
+
+    Under Django 3.2, ASGI runs every sync view on one shared thread, so a slow
+    query blocks all the other requests of the worker. The read actions of the
+    wrapped view run on a pool of worker threads instead, one request each, and
+    the event loop keeps serving while they wait on the database. Every other
+    action still runs like a sync view.
+    """
+    read_methods = {
+        method for method, action in view.actions.items() if action in READ_ACTIONS
+    }
+    run_read = sync_to_async(partial(_run_view, view), thread_sensitive=False)
+    run_write = sync_to_async(view, thread_sensitive=True)
+
+    async def async_view(request, *args, **kwargs):
+        if request.method.lower() in read_methods:
+            return await run_read(request, *args, **kwargs)
+        return await run_write(request, *args, **kwargs)
+
+    # NOTE: Keeps the cls, actions and csrf_exempt attributes of the view, the
+    # schema generation relies on them.
+    return update_wrapper(async_view, view)
+
+
+def async_thread_view(view, max_threads: int):
+    """
+    Wrap a sync view into an async view running on threads of its own.
+
+    For views spending their time waiting on something other than the database,
+    e.g. the password hashing pool of core.hashing. Served like a plain sync
+    view, every request would queue behind them on the shared thread. On the
+    threads of the read views, a burst of them would hold all of those. Up to
+    max_threads requests run at once, the others wait without holding a thread.
+    """
+    executor = None
+    lock = threading.Lock()
+
+    def get_executor():
+        nonlocal executor
+        # NOTE: Created on the first request, i.e. after the server forked.
+        with lock:
+            if executor is None:
+                executor = ThreadPoolExecutor(
+                    max_threads, thread_name_prefix=view.__name__
+                )
+        return executor
+
+    async def async_view(request, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            get_executor(), partial(_run_view, view, request, *args, **kwargs)
+        )
+
+    return update_wrapper(async_view, view)
+
+
+def async_read_patterns(patterns):
+    """Return the URL patterns with the viewset read actions served async."""
+    return [
+        URLPattern(
+            pattern.pattern,
+            async_read_view(pattern.callback),
+            pattern.default_args,
+            pattern.name,
+        )
+        if set(getattr(pattern.callback, "actions", {}).values()) & set(READ_ACTIONS)
+        else pattern
+        for pattern in patterns
+    ]
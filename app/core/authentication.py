@@ -0,0 +1,174 @@
+"""
+Authentication classes for the APIs
+"""
+
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from core import signed_tokens
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import (
+    BaseAuthentication,
+    TokenAuthentication,
+    get_authorization_header,
+)
+
+
+class TTLCache:
+    """Thread-safe LRU mapping whose entries expire after a time to live."""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the value stored under key, or None if missing or expired."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Store value under key, evicting the least recently used entries."""
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        """Remove key if present."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+token_cache = TTLCache(
+    max_size=settings.TOKEN_AUTH_CACHE["MAX_SIZE"],
+    ttl=settings.TOKEN_AUTH_CACHE["TTL"],
+)
+
+
+def _shared_cache():
+    """Return the Django cache backing the in-process one, if configured."""
+    alias = settings.TOKEN_AUTH_CACHE["CACHE_ALIAS"]
+    if alias:
+        return caches[alias]
+    return None
+
+
+def _shared_cache_key(key: str) -> str:
+    """Return the shared cache key of a token, without exposing the token."""
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return f"auth:token:{digest}"
+
+
+def invalidate_token(key: str):
+    """Drop a token from every cache tier."""
+    token_cache.delete(key)
+    shared_cache = _shared_cache()
+    if shared_cache is not None:
+        shared_cache.delete(_shared_cache_key(key))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication that resolves tokens without a database round trip.
+
+    Tokens and their users are kept in an in-process LRU cache with a time to
+    live, optionally backed by a Django cache shared between processes. Only a
+    miss on every tier reaches the database.
+
+    Entries are invalidated when a token is deleted or its user is saved. Other
+    processes only notice through the shared cache or once the in-process entry
+    expires, so the in-process time to live should be kept short.
+    """
+
+    def authenticate_credentials(self, key):
+        token = token_cache.get(key)
+
+        if token is None:
+            shared_cache = _shared_cache()
+            if shared_cache is not None:
+                token = shared_cache.get(_shared_cache_key(key))
+
+            if token is None:
+                # NOTE: Raises AuthenticationFailed for unknown and inactive users.
+                user, token = super().authenticate_credentials(key)
+                if shared_cache is not None:
+                    shared_cache.set(
+                        _shared_cache_key(key),
+                        token,
+                        timeout=settings.TOKEN_AUTH_CACHE["CACHE_TTL"],
+                    )
+
+            token_cache.set(key, token)
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+
+        # NOTE: Every request gets its own copy, views are free to modify
+        # request.user without touching the cached object.
+        token = copy.deepcopy(token)
+        return (token.user, token)
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """
+    Authentication by the signed access tokens of core.signed_tokens.
+
+    Clients send "Authorization: Bearer <access token>". The token is checked
+    in CPU and against the revocation list, request.user is built from its
+    claims and request.auth holds them. Neither touches the database.
+    """
+
+    keyword = "Bearer"
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed(
+                _("Invalid token header. Expected a single token.")
+            )
+        try:
+            token = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed(_("Invalid token."))
+        try:
+            claims = signed_tokens.verify_token(token, signed_tokens.ACCESS)
+        except signed_tokens.InvalidToken as error:
+            raise exceptions.AuthenticationFailed(str(error))
+
+        return (signed_tokens.get_token_user(claims), claims)
+
+    def authenticate_header(self, request):
+        return self.keyword
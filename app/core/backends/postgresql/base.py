@@ -0,0 +1,107 @@
+"""
+PostgreSQL database backend with connection health checks and pooling
+"""
+
+from django.db.backends.postgresql import base
+
+from core.backends.postgresql.creation import DatabaseCreation
+from core.backends.postgresql.pool import get_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    Django's PostgreSQL backend, extended with two settings of the connection.
+
+    CONN_HEALTH_CHECKS, when true, checks that a persistent connection still
+    works the first time it is used by each request and reconnects otherwise,
+    instead of failing the request (backported from Django 4.1).
+
+    POOL, a dict with MAX_SIZE and TIMEOUT, shares up to MAX_SIZE connections
+    between the threads of the process. Closing the connection returns it to
+    the pool, so with CONN_MAX_AGE = 0 a connection is only held for the
+    duration of a request. A MAX_SIZE of 0 disables the pool.
+    """
+
+    creation_class = DatabaseCreation
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_enabled = self.settings_dict.get("CONN_HEALTH_CHECKS", False)
+        self.health_check_done = False
+
+    @property
+    def pool_options(self):
+        return self.settings_dict.get("POOL") or {}
+
+    def get_pool(self, conn_params):
+        """Return the pool for the connection parameters, None if disabled."""
+        max_size = self.pool_options.get("MAX_SIZE", 0)
+        if not max_size:
+            return None
+
+        # NOTE: Keyed on the parameters as well as the alias, the test runner
+        # points the same alias at another database.
+        key = (self.alias, repr(sorted(conn_params.items())))
+        return get_pool(key, max_size, self.pool_options.get("TIMEOUT", 30))
+
+    def get_new_connection(self, conn_params):
+        pool = self.get_pool(conn_params)
+        self._pool = pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+
+        connection, reused = pool.getconn(
+            lambda: super(DatabaseWrapper, self).get_new_connection(conn_params)
+        )
+        if reused:
+            self.isolation_level = self.settings_dict["OPTIONS"].get(
+                "isolation_level", connection.isolation_level
+            )
+            # NOTE: An idle connection may have been dropped by the server while
+            # it sat in the pool.
+            self._pooled_connection_reused = True
+        return connection
+
+    def connect(self):
+        self._pooled_connection_reused = False
+        super().connect()
+        # NOTE: A new connection is known to work, a pooled one is checked by the
+        # first cursor if health checks are enabled.
+        self.health_check_done = not self._pooled_connection_reused
+
+    def _close(self):
+        pool = getattr(self, "_pool", None)
+        if pool is None:
+            return super()._close()
+
+        with self.wrap_database_errors:
+            # NOTE: Connections in an unknown state are not handed to other
+            # requests, nor is one closed from inside an atomic block since this
+            # wrapper keeps a reference to it until the block exits.
+            discard = self.in_atomic_block or (
+                self.errors_occurred and not self.is_usable()
+            )
+            return pool.putconn(self.connection, discard=discard)
+
+    def _cursor(self, name=None):
+        self.close_if_health_check_failed()
+        return super()._cursor(name)
+
+    def close_if_health_check_failed(self):
+        """Close the connection if it fails a health check."""
+        if (
+            self.connection is None
+            or not self.health_check_enabled
+            or self.health_check_done
+        ):
+            return
+
+        if not self.is_usable():
+            self.close()
+        self.health_check_done = True
+
+    def close_if_unusable_or_obsolete(self):
+        # NOTE: Called at the start and the end of every request, the next use of
+        # the connection checks it again.
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
@@ -0,0 +1,11 @@
+from django.db.backends.postgresql import creation
+
+from core.backends.postgresql.pool import close_idle_connections
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # NOTE: Idle pooled connections to the test database would otherwise
+        # prevent it from being dropped.
+        close_idle_connections()
+        super()._destroy_test_db(test_database_name, verbosity)
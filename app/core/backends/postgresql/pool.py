@@ -0,0 +1,153 @@
+"""
+In-process pool of PostgreSQL connections
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+from psycopg2 import OperationalError, extensions
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(OperationalError):
+    """No connection was returned to a full pool in time."""
+
+
+class ConnectionPool:
+    """Bounded set of connections shared by the threads of one process."""
+
+    def __init__(self, max_size: int, timeout: float):
+        self.max_size = max_size
+        self.timeout = timeout
+        # NOTE: Idle connections are reused last in, first out, so the ones
+        # left over after a burst stay idle and are the first to go stale.
+        self._idle = deque()
+        self._size = 0
+        self._waiting = 0
+        self._pid = os.getpid()
+        self._condition = threading.Condition()
+
+    def getconn(self, factory):
+        """
+        Take an idle connection, or open one with factory while below max_size.
+
+        Blocks for up to timeout seconds when every connection is in use.
+        Returns the connection and whether it was reused from the pool.
+        """
+        deadline = time.monotonic() + self.timeout
+        with self._condition:
+            self._check_fork()
+            while True:
+                while self._idle:
+                    connection = self._idle.pop()
+                    if not connection.closed:
+                        return connection, True
+                    self._size -= 1
+
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(
+                        f"No database connection became available within "
+                        f"{self.timeout} seconds, all {self.max_size} are in use."
+                    )
+                self._waiting += 1
+                try:
+                    self._condition.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+        try:
+            return factory(), False
+        except Exception:
+            self._release_slot()
+            raise
+
+    def putconn(self, connection, discard=False):
+        """Return a connection taken from the pool, closing it if discard."""
+        with self._condition:
+            if self._check_fork():
+                return
+
+            if not discard and not connection.closed:
+                try:
+                    # NOTE: Whatever the previous user left open must not leak
+                    # into the next one.
+                    status = connection.info.transaction_status
+                    if status != extensions.TRANSACTION_STATUS_IDLE:
+                        connection.rollback()
+                except Exception:
+                    discard = True
+
+            if discard or connection.closed:
+                self._size -= 1
+                self._close(connection)
+            else:
+                self._idle.append(connection)
+            self._condition.notify()
+
+    def close_idle(self):
+        """Close every idle connection, the ones in use are left alone."""
+        with self._condition:
+            self._check_fork()
+            while self._idle:
+                self._close(self._idle.pop())
+                self._size -= 1
+            self._condition.notify_all()
+
+    def stats(self):
+        """Return the number of open, idle and in use connections and waiters."""
+        with self._condition:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "waiting": self._waiting,
+            }
+
+    def _release_slot(self):
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+    def _check_fork(self):
+        """Forget the connections inherited from the parent after a fork."""
+        # NOTE: The sockets are shared with the parent process, closing them here
+        # would terminate its sessions. They are dropped instead.
+        pid = os.getpid()
+        if pid == self._pid:
+            return False
+
+        self._pid = pid
+        self._idle.clear()
+        self._size = 0
+        return True
+
+    @staticmethod
+    def _close(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+def get_pool(key, max_size: int, timeout: float):
+    """Return the process wide pool for key, creating it on first use."""
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.setdefault(key, ConnectionPool(max_size, timeout))
+    return pool
+
+
+def close_idle_connections():
+    """Close the idle connections of every pool, e.g. before forking workers."""
+    for pool in list(_pools.values()):
+        pool.close_idle()
@@ -0,0 +1,160 @@
+"""
+Password hashing on a bounded pool of threads
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class HashingPoolFull(APIException):
+    """Every worker of the hashing pool is busy and its queue is full."""
+
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Too many authentication requests, try again shortly."
+    default_code = "hashing_pool_full"
+    # NOTE: Sent as the Retry-After header by DRF's exception handler.
+    wait = 1
+
+
+class HashingPool:
+    """
+    Threads hashing passwords, with their own concurrency limit and queue.
+
+    At most `workers` passwords are hashed at once by the process, so a burst
+    of logins or signups cannot take every core. Up to `queue_size` more wait
+    for a worker, further ones are rejected straight away with HashingPoolFull
+    rather than piling up behind them. PBKDF2 releases the GIL, the other
+    threads of the process keep running meanwhile.
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = os.getpid()
+        self._reset_counters()
+
+    def run(self, func, *args):
+        """
+        Run func on a worker and return its result, once it is done.
+
+        Runs it on the calling thread if the pool has no workers.
+
+        :raises HashingPoolFull: If the workers and the queue are all taken.
+        """
+        if self.workers <= 0:
+            return func(*args)
+
+        with self._lock:
+            self._check_fork()
+            full = self._pending >= self.workers + self.queue_size
+            # NOTE: Only the first rejection of a burst is logged, the counters
+            # keep track of the others.
+            first_rejection = full and not self._saturated
+            self._saturated = full
+            if full:
+                self._rejected += 1
+            else:
+                self._pending += 1
+                self._submitted += 1
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        self.workers, thread_name_prefix="password-hashing"
+                    )
+                executor = self._executor
+
+        if full:
+            if first_rejection:
+                logger.warning("Password hashing pool full: %s", self.stats())
+            raise HashingPoolFull()
+
+        future = executor.submit(self._call, time.monotonic(), func, args)
+        return future.result()
+
+    def stats(self) -> dict:
+        """Return the occupancy of the pool and its counters since it started."""
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "running": self._running,
+                "queued": self._pending - self._running,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "wait_seconds_total": self._wait_total,
+                "wait_seconds_max": self._wait_max,
+                "run_seconds_total": self._run_total,
+            }
+
+    def _call(self, queued_at, func, args):
+        started = time.monotonic()
+        with self._lock:
+            self._running += 1
+            self._wait_total += started - queued_at
+            self._wait_max = max(self._wait_max, started - queued_at)
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._pending -= 1
+                self._completed += 1
+                self._run_total += time.monotonic() - started
+
+    def _reset_counters(self):
+        self._saturated = False
+        self._pending = 0
+        self._running = 0
+        self._submitted = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+
+    def _check_fork(self):
+        """Forget the threads inherited from the parent after a fork."""
+        # NOTE: Threads do not survive a fork, the child starts its own.
+        pid = os.getpid()
+        if pid != self._pid:
+            self._pid = pid
+            self._executor = None
+            self._reset_counters()
+
+
+def get_hashing_pool() -> HashingPool:
+    """Return the process wide hashing pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        options = settings.PASSWORD_HASHING
+        with _pool_lock:
+            if _pool is None:
+                _pool = HashingPool(options["WORKERS"], options["QUEUE_SIZE"])
+    return _pool
+
+
+class PooledPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2PasswordHasher computing its digests on the hashing pool.
+
+    The hashes are the same "pbkdf2_sha256" ones, existing passwords keep
+    working. Setting, checking and upgrading a password all go through encode().
+    """
+
+    def encode(self, password, salt, iterations=None):
+        return get_hashing_pool().run(super().encode, password, salt, iterations)
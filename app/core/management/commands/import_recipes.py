@@ -0,0 +1,228 @@
+"""
+Django command to bulk import recipes from NDJSON or CSV files
+"""
+import csv
+import io
+import json
+from decimal import Decimal, InvalidOperation
+from functools import partial
+
+from core.models import Recipe
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from recipe.caching import bump_collection_version
+
+RELATED_FIELDS = ('tags', 'ingredients')
+# NOTE: Separator of the tag and ingredient names inside a CSV cell.
+CSV_LIST_SEPARATOR = '|'
+
+
+def _names(value):
+    """ Normalize nested items given as names or as {"name": ...} objects """
+    if isinstance(value, str):
+        value = value.split(CSV_LIST_SEPARATOR)
+    names = []
+    for item in value or []:
+        name = item['name'] if isinstance(item, dict) else item
+        name = name.strip()
+        if name:
+            names.append(name)
+    return names
+
+
+def _read_ndjson(stream):
+    """ Yield the recipes of a newline delimited JSON stream """
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def _read_csv(stream):
+    """ Yield the recipes of a CSV stream with a header row """
+    yield from csv.DictReader(stream)
+
+
+class Command(BaseCommand):
+    """ Django command to import recipes for a user """
+
+    help = (
+        'Import recipes with nested tags and ingredients for a user, '
+        'using COPY into staging tables and set-based merges.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='NDJSON or CSV file to import.')
+        parser.add_argument(
+            '--user', required=True, help='Email of the owner of the recipes.'
+        )
+        parser.add_argument(
+            '--format',
+            choices=['ndjson', 'csv'],
+            help='Format of the file, guessed from its extension by default.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Number of recipes buffered in memory per COPY.',
+        )
+
+    def handle(self, *args, **options):
+        """ Entrypoint for command """
+        try:
+            user = get_user_model().objects.get(email=options['user'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"User {options['user']} does not exist")
+
+        file_format = options['format']
+        if file_format is None:
+            file_format = 'csv' if options['path'].endswith('.csv') else 'ndjson'
+        reader = _read_csv if file_format == 'csv' else _read_ndjson
+
+        with open(options['path'], newline='', encoding='utf-8') as stream:
+            with transaction.atomic(), connection.cursor() as cursor:
+                self._create_staging_tables(cursor)
+                count = self._copy(cursor, reader(stream), options['batch_size'])
+                self._merge(cursor, user)
+
+            transaction.on_commit(partial(bump_collection_version, user.id))
+
+        self.stdout.write(self.style.SUCCESS(f'Imported {count} recipes'))
+
+    def _create_staging_tables(self, cursor):
+        """ Create the temporary tables the file is copied into """
+        # NOTE: ON COMMIT DROP removes the tables together with the transaction,
+        # the DROP only matters when the command runs twice in one transaction.
+        cursor.execute(
+            """
+            DROP TABLE IF EXISTS
+                pg_temp.import_recipe, pg_temp.import_tags, pg_temp.import_ingredients;
+            CREATE TEMP TABLE import_recipe (
+                line integer PRIMARY KEY,
+                id bigint,
+                title varchar(255) NOT NULL,
+                description text NOT NULL,
+                time_minutes integer NOT NULL,
+                price numeric(5, 2) NOT NULL,
+                link varchar(255) NOT NULL
+            ) ON COMMIT DROP;
+            CREATE TEMP TABLE import_tags (
+                line integer NOT NULL,
+                name varchar(255) NOT NULL
+            ) ON COMMIT DROP;
+            CREATE TEMP TABLE import_ingredients (
+                line integer NOT NULL,
+                name varchar(255) NOT NULL
+            ) ON COMMIT DROP;
+            """
+        )
+
+    def _copy(self, cursor, recipes, batch_size):
+        """ COPY the recipes into the staging tables, a batch at a time """
+        buffers = self._new_buffers()
+        count = 0
+        for line, recipe in enumerate(recipes, start=1):
+            try:
+                row = [
+                    line,
+                    recipe['title'],
+                    recipe.get('description') or '',
+                    int(recipe['time_minutes']),
+                    Decimal(str(recipe['price'])),
+                    recipe.get('link') or '',
+                ]
+            except (KeyError, TypeError, ValueError, InvalidOperation) as error:
+                raise CommandError(f'Invalid recipe on line {line}: {error!r}')
+
+            buffers['recipe'][1].writerow(row)
+            for field_name in RELATED_FIELDS:
+                for name in _names(recipe.get(field_name)):
+                    buffers[field_name][1].writerow([line, name])
+
+            count += 1
+            if count % batch_size == 0:
+                self._flush(cursor, buffers)
+                buffers = self._new_buffers()
+
+        self._flush(cursor, buffers)
+        return count
+
+    def _new_buffers(self):
+        """ Return an in-memory CSV buffer and writer per staging table """
+        buffers = {}
+        for name in ('recipe',) + RELATED_FIELDS:
+            buffer = io.StringIO()
+            # NOTE: Quoting every value keeps empty strings from being read as
+            # NULL by COPY.
+            buffers[name] = (buffer, csv.writer(buffer, quoting=csv.QUOTE_ALL))
+        return buffers
+
+    def _flush(self, cursor, buffers):
+        """ COPY the buffered rows into the staging tables """
+        columns = {
+            'recipe': 'line, title, description, time_minutes, price, link',
+            'tags': 'line, name',
+            'ingredients': 'line, name',
+        }
+        for name, (buffer, _) in buffers.items():
+            buffer.seek(0)
+            cursor.copy_expert(
+                f'COPY import_{name} ({columns[name]}) FROM STDIN WITH (FORMAT csv)',
+                buffer,
+            )
+
+    def _merge(self, cursor, user):
+        """ Merge the staging tables into the recipe, tag and ingredient tables """
+        cursor.execute('ANALYZE import_recipe, import_tags, import_ingredients')
+
+        recipe_table = Recipe._meta.db_table
+        # NOTE: The ids are drawn from the sequence up front, so the links can be
+        # joined to the new recipes by line number.
+        cursor.execute(
+            f"""
+            UPDATE import_recipe
+            SET id = nextval(pg_get_serial_sequence('{recipe_table}', 'id'));
+            INSERT INTO {recipe_table}
+                (id, user_id, title, description, time_minutes, price, link)
+            SELECT id, %s, title, description, time_minutes, price, link
+            FROM import_recipe;
+            """,
+            [user.id],
+        )
+
+        for field_name in RELATED_FIELDS:
+            field = Recipe._meta.get_field(field_name)
+            related_table = field.related_model._meta.db_table
+            through_table = field.remote_field.through._meta.db_table
+            source = f'{field.m2m_field_name()}_id'
+            target = f'{field.m2m_reverse_field_name()}_id'
+            # NOTE: Names already used by the user are reused, the unique
+            # (user_id, name) constraint turns them into ignored conflicts. The
+            # recipe counts are incremented by the links actually inserted.
+            cursor.execute(
+                f"""
+                INSERT INTO {related_table} (user_id, name, recipe_count)
+                SELECT DISTINCT %s, name, 0
+                FROM import_{field_name}
+                ON CONFLICT (user_id, name) DO NOTHING;
+                WITH inserted AS (
+                    INSERT INTO {through_table} ({source}, {target})
+                    SELECT DISTINCT recipe.id, related.id
+                    FROM import_{field_name} staged
+                    JOIN import_recipe recipe ON recipe.line = staged.line
+                    JOIN {related_table} related
+                        ON related.user_id = %s AND related.name = staged.name
+                    RETURNING {target}
+                )
+                UPDATE {related_table} related
+                SET recipe_count = related.recipe_count + link.count
+                FROM (
+                    SELECT {target}, COUNT(*) AS count
+                    FROM inserted
+                    GROUP BY {target}
+                ) link
+                WHERE link.{target} = related.id;
+                """,
+                [user.id, user.id],
+            )
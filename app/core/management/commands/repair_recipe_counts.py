@@ -0,0 +1,42 @@
+"""
+Django command to repair the recipe counts of tags and ingredients
+"""
+from core.models import Ingredient, Tag
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from recipe.counters import refresh_recipe_counts
+
+
+class Command(BaseCommand):
+    """ Django command to recount the recipes of tags and ingredients """
+
+    help = (
+        'Recount the recipes linked to every tag and ingredient and correct the '
+        'counts that drifted, e.g. after links were written with raw SQL.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', help='Email of the only user whose counts are repaired.'
+        )
+
+    def handle(self, *args, **options):
+        """ Entrypoint for command """
+        user = None
+        if options['user']:
+            try:
+                user = get_user_model().objects.get(email=options['user'])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"User {options['user']} does not exist")
+
+        for model in (Tag, Ingredient):
+            queryset = model.objects.all()
+            if user is not None:
+                queryset = queryset.filter(user=user)
+            # NOTE: One UPDATE per model, which only writes the rows that drifted.
+            repaired = refresh_recipe_counts(queryset)
+            self.stdout.write(
+                f'Repaired {repaired} {model._meta.verbose_name_plural}'
+            )
+
+        self.stdout.write(self.style.SUCCESS('Recipe counts are up to date'))
@@ -0,0 +1,38 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:05
+
+from django.db import migrations, models
+
+# NOTE: The auto-created through tables are not models of their own, so their
+# indexes are managed here. The unique (recipe_id, <related>_id) index already
+# serves lookups by recipe; these serve filtering and counting by tag or
+# ingredient with index-only scans.
+CREATE_THROUGH_INDEXES = """
+CREATE INDEX core_recipe_tags_tag_recipe_idx
+    ON core_recipe_tags (tag_id, recipe_id);
+CREATE INDEX core_recipe_ingredients_ingredient_recipe_idx
+    ON core_recipe_ingredients (ingredient_id, recipe_id);
+"""
+
+DROP_THROUGH_INDEXES = """
+DROP INDEX core_recipe_tags_tag_recipe_idx;
+DROP INDEX core_recipe_ingredients_ingredient_recipe_idx;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['user', 'time_minutes'], name='core_recipe_user_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['user', 'price'], name='core_recipe_user_price_idx'),
+        ),
+        migrations.RunSQL(CREATE_THROUGH_INDEXES, DROP_THROUGH_INDEXES),
+    ]
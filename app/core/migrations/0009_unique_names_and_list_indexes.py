@@ -0,0 +1,78 @@
+# Generated by Django 3.2.25 on 2026-10-18 11:20
+
+from django.db import migrations, models
+
+
+def dedupe_sql(table, through_table, column):
+    """ Merge the rows of table sharing a user and name into the oldest one
+
+    The recipes linked to a duplicate are linked to the oldest row instead,
+    then the links to the duplicates and the duplicates themselves are deleted.
+    """
+    return f"""
+    INSERT INTO {through_table} (recipe_id, {column})
+    SELECT link.recipe_id, keep.id
+    FROM {through_table} link
+    JOIN {table} dup ON dup.id = link.{column}
+    JOIN {table} keep
+        ON keep.user_id = dup.user_id AND keep.name = dup.name AND keep.id < dup.id
+    WHERE NOT EXISTS (
+        SELECT 1 FROM {table} older
+        WHERE older.user_id = keep.user_id
+            AND older.name = keep.name
+            AND older.id < keep.id
+    )
+    ON CONFLICT DO NOTHING;
+
+    DELETE FROM {through_table} link
+    USING {table} dup, {table} keep
+    WHERE link.{column} = dup.id
+        AND keep.user_id = dup.user_id
+        AND keep.name = dup.name
+        AND keep.id < dup.id;
+
+    DELETE FROM {table} dup
+    USING {table} keep
+    WHERE keep.user_id = dup.user_id
+        AND keep.name = dup.name
+        AND keep.id < dup.id;
+
+    -- The deferred foreign key checks must run before the table can be altered.
+    SET CONSTRAINTS ALL IMMEDIATE;
+    """
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_recipe_filter_indexes'),
+    ]
+
+    operations = [
+        # NOTE: Duplicates must be merged before the unique constraints can be
+        # created. Merging cannot be undone, so reversing skips it.
+        migrations.RunSQL(
+            dedupe_sql('core_tag', 'core_recipe_tags', 'tag_id'),
+            migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            dedupe_sql('core_ingredient', 'core_recipe_ingredients', 'ingredient_id'),
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['user', '-id'], name='core_ingredient_user_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['user', '-id'], name='core_recipe_user_id_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('user', 'name'), name='core_ingredient_user_name_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='tag',
+            constraint=models.UniqueConstraint(fields=('user', 'name'), name='core_tag_user_name_uniq'),
+        ),
+    ]
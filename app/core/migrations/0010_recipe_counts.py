@@ -0,0 +1,54 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:24
+
+from django.db import migrations, models
+
+
+def backfill_sql(table, through_table, column):
+    """ Set the recipe count of every row of table from its links """
+    return f"""
+    UPDATE {table} related
+    SET recipe_count = link.count
+    FROM (
+        SELECT {column}, COUNT(*) AS count
+        FROM {through_table}
+        GROUP BY {column}
+    ) link
+    WHERE link.{column} = related.id;
+    """
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_unique_names_and_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingredient',
+            name='recipe_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='recipe_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        # NOTE: Rows without links keep the default of 0. Reversing drops the
+        # columns, so there is nothing to undo.
+        migrations.RunSQL(
+            backfill_sql('core_tag', 'core_recipe_tags', 'tag_id'),
+            migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            backfill_sql('core_ingredient', 'core_recipe_ingredients', 'ingredient_id'),
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['user', 'recipe_count', 'id'], name='core_ingredient_user_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['user', 'recipe_count', 'id'], name='core_tag_user_count_idx'),
+        ),
+    ]
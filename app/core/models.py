@@ -8,6 +8,8 @@ from django.contrib.auth.models import (
     BaseUserManager,
     PermissionsMixin,
 )
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
 
@@ -64,6 +66,20 @@ class Recipe(models.Model):
     link = models.CharField(max_length=255, blank=True)
     tags = models.ManyToManyField("Tag")
     ingredients = models.ManyToManyField("Ingredient")
+    # NOTE: Kept up to date from title and description by a database trigger on
+    # every write, see migration 0007_recipe_search_vector.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="core_recipe_search_idx"),
+            models.Index(
+                fields=["user", "time_minutes"], name="core_recipe_user_time_idx"
+            ),
+            models.Index(fields=["user", "price"], name="core_recipe_user_price_idx"),
+            # NOTE: Serves the recipe list, "WHERE user_id = ? ORDER BY id DESC".
+            models.Index(fields=["user", "-id"], name="core_recipe_user_id_idx"),
+        ]
 
     def __str__(self):
         return self.title
@@ -74,6 +90,24 @@ class Tag(models.Model):
 
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     name = models.CharField(max_length=255)
+    # NOTE: Number of recipes linked to the tag, maintained on every write of the
+    # links, see recipe.counters.
+    recipe_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        # NOTE: The unique index also serves the tag list, which is ordered by
+        # name, and the lookups by name of the recipe serializers.
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "name"], name="core_tag_user_name_uniq"
+            ),
+        ]
+        indexes = [
+            # NOTE: Serves the tag list ordered by popularity, in both directions.
+            models.Index(
+                fields=["user", "recipe_count", "id"], name="core_tag_user_count_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -84,6 +118,23 @@ class Ingredient(models.Model):
 
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     name = models.CharField(max_length=255)
+    # NOTE: Number of recipes linked to the ingredient, see Tag.recipe_count.
+    recipe_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "name"], name="core_ingredient_user_name_uniq"
+            ),
+        ]
+        indexes = [
+            # NOTE: Serves the ingredient list, "WHERE user_id = ? ORDER BY id DESC".
+            models.Index(fields=["user", "-id"], name="core_ingredient_user_id_idx"),
+            models.Index(
+                fields=["user", "recipe_count", "id"],
+                name="core_ingredient_user_count_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
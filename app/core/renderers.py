@@ -0,0 +1,77 @@
+"""
+Fast JSON renderer and parser for the APIs, backed by orjson when installed
+"""
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+# NOTE: Datetimes are left to DRF's encoder, which formats them differently from
+# orjson. Dict keys such as ints are converted to strings like json does.
+ORJSON_OPTIONS = (
+    orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson else 0
+)
+
+_encoder = JSONEncoder()
+
+
+def dumps(data) -> bytes:
+    """
+    Serialize data to compact JSON, the same bytes as DRF's JSONRenderer.
+
+    Types orjson does not handle natively, such as Decimal, lazy translations
+    or datetimes, are converted by DRF's encoder.
+    """
+    if orjson is None:
+        return JSONRenderer().render(data)
+
+    content = orjson.dumps(data, default=_encoder.default, option=ORJSON_OPTIONS)
+    # NOTE: Escaped by DRF too, they are valid in JSON but not in JavaScript.
+    return content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+        b"\xe2\x80\xa9", b"\\u2029"
+    )
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Drop-in replacement of DRF's JSONRenderer, rendering with orjson.
+
+    Indented output, and the non-default UNICODE_JSON and COMPACT_JSON
+    settings, are still rendered by DRF's renderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        renderer_context = renderer_context or {}
+        if (
+            orjson is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context)
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        return dumps(data)
+
+
+class ORJSONParser(JSONParser):
+    """Drop-in replacement of DRF's JSONParser, parsing with orjson."""
+
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
@@ -0,0 +1,116 @@
+"""
+OpenAPI schema generated once and served from memory
+"""
+
+import hashlib
+import json
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from drf_spectacular.extensions import OpenApiAuthenticationExtension
+from drf_spectacular.utils import extend_schema
+from drf_spectacular.views import SCHEMA_KWARGS, SpectacularAPIView
+from rest_framework import status
+
+_schema = None
+_rendered = {}
+_lock = threading.Lock()
+
+
+def get_schema(view_class=SpectacularAPIView):
+    """
+    Return the OpenAPI document of the API, generated on first use.
+
+    If OPENAPI_SCHEMA_FILE names a file, e.g. written at build time by
+    `manage.py spectacular --format openapi-json --file <path>`, the document
+    is read from it instead.
+    """
+    global _schema
+    if _schema is None:
+        with _lock:
+            if _schema is None:
+                _schema = _load_schema(view_class)
+    return _schema
+
+
+def _load_schema(view_class):
+    if settings.OPENAPI_SCHEMA_FILE:
+        try:
+            with open(settings.OPENAPI_SCHEMA_FILE, encoding="utf-8") as schema_file:
+                return json.load(schema_file)
+        except FileNotFoundError:
+            pass
+
+    generator = view_class.generator_class(
+        urlconf=view_class.urlconf, api_version=view_class.api_version
+    )
+    return generator.get_schema(request=None, public=view_class.serve_public)
+
+
+def clear_schema_cache():
+    """Forget the document and its renderings, e.g. after the URLs changed."""
+    global _schema
+    with _lock:
+        _schema = None
+        _rendered.clear()
+
+
+class CachedSpectacularAPIView(SpectacularAPIView):
+    """
+    Serve the OpenAPI schema from memory, with an ETag.
+
+    The document is rendered once per format, then every request is answered
+    with the same bytes, or with 304 when the client's copy is current.
+    """
+
+    @extend_schema(**SCHEMA_KWARGS)
+    def get(self, request, *args, **kwargs):
+        # NOTE: Translated schemas are rare, they are still generated each time.
+        if settings.USE_I18N and request.GET.get("lang"):
+            return super().get(request, *args, **kwargs)
+
+        content, content_type, etag = self._get_rendered(request)
+        if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+        if etag in if_none_match or "*" in if_none_match:
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = HttpResponse(content, content_type=content_type)
+
+        response["ETag"] = etag
+        patch_cache_control(response, no_cache=True)
+        return response
+
+    def _get_rendered(self, request):
+        """Return the rendered schema, its content type and ETag."""
+        renderer = request.accepted_renderer
+        key = (type(renderer), request.accepted_media_type)
+        rendered = _rendered.get(key)
+        if rendered is None:
+            content = renderer.render(
+                get_schema(type(self)),
+                request.accepted_media_type,
+                self.get_renderer_context(),
+            )
+            content_type = renderer.media_type
+            if renderer.charset:
+                content_type = f"{content_type}; charset={renderer.charset}"
+            etag = f'"{hashlib.sha1(content).hexdigest()}"'
+            rendered = _rendered.setdefault(key, (content, content_type, etag))
+        return rendered
+
+
+class SignedTokenScheme(OpenApiAuthenticationExtension):
+    """Describe core.authentication.SignedTokenAuthentication as bearer tokens."""
+
+    target_class = "core.authentication.SignedTokenAuthentication"
+    name = "signedTokenAuth"
+
+    def get_security_definition(self, auto_schema):
+        return {
+            "type": "http",
+            "scheme": "bearer",
+            "description": "Signed access token from /api/user/token/signed/",
+        }
@@ -0,0 +1,41 @@
+"""
+Signal handlers for the core models
+"""
+
+from core.authentication import invalidate_token
+from core.signed_tokens import revoke_user_tokens
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """Stop accepting a deleted token from the authentication caches."""
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    """Drop the cached tokens of a changed user, e.g. after deactivation."""
+    if created:
+        return
+
+    for key in Token.objects.filter(user=instance).values_list("key", flat=True):
+        invalidate_token(key)
+
+
+@receiver(post_save, sender=get_user_model())
+def revoke_signed_tokens(sender, instance, created, **kwargs):
+    """Revoke the signed tokens of a user who was deactivated or changed password."""
+    # NOTE: set_password() keeps the raw password on the instance until save()
+    # has run, i.e. through post_save.
+    if not created and (not instance.is_active or instance._password is not None):
+        revoke_user_tokens(instance.pk)
+
+
+@receiver(post_delete, sender=get_user_model())
+def revoke_deleted_user_tokens(sender, instance, **kwargs):
+    """Revoke the signed tokens of a deleted user."""
+    revoke_user_tokens(instance.pk)
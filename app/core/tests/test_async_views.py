@@ -0,0 +1,135 @@
+"""
+Tests for the async views serving the read actions.
+"""
+
+import asyncio
+import json
+import threading
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+from core.async_views import async_read_patterns, async_read_view, async_thread_view
+from core.models import Recipe, Tag
+from django.contrib.auth import get_user_model
+from django.test import AsyncRequestFactory, TransactionTestCase
+from recipe.urls import router
+from recipe.views import RecipeViewSet, TagViewset
+from rest_framework.authtoken.models import Token
+from user.views import CreateTokenView
+
+
+class AsyncReadViewTests(TransactionTestCase):
+    """Test the async views against committed data"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "user@example.com", "testpass123"
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.factory = AsyncRequestFactory()
+        self.headers = {"authorization": f"Token {self.token.key}"}
+        self.recipe = Recipe.objects.create(
+            user=self.user, title="Soup", time_minutes=10, price="5.00"
+        )
+
+    async def test_list_and_retrieve(self):
+        """Test the read actions return the same data as the sync views"""
+        view = async_read_view(
+            RecipeViewSet.as_view({"get": "list", "post": "create"})
+        )
+        detail_view = async_read_view(RecipeViewSet.as_view({"get": "retrieve"}))
+
+        res = await view(self.factory.get("/api/recipe/recipes/", **self.headers))
+        detail = await detail_view(
+            self.factory.get(f"/api/recipe/recipes/{self.recipe.id}/", **self.headers),
+            pk=self.recipe.id,
+        )
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(
+            [item["title"] for item in json.loads(res.content)["results"]], ["Soup"]
+        )
+        self.assertEqual(detail.status_code, 200)
+        self.assertEqual(json.loads(detail.content)["id"], self.recipe.id)
+
+    async def test_writes_not_affected(self):
+        """Test actions other than list and retrieve still run as sync views"""
+        view = async_read_view(
+            RecipeViewSet.as_view({"get": "list", "post": "create"})
+        )
+        request = self.factory.post(
+            "/api/recipe/recipes/",
+            {"title": "Stew", "time_minutes": 30, "price": "8.00"},
+            content_type="application/json",
+            **self.headers,
+        )
+
+        res = await view(request)
+
+        self.assertEqual(res.status_code, 201)
+        exists = await sync_to_async(
+            Recipe.objects.filter(user=self.user, title="Stew").exists
+        )()
+        self.assertTrue(exists)
+
+    async def test_concurrent_requests(self):
+        """Test slow requests of a worker are served at the same time"""
+        # NOTE: Each request waits for the other one, if they were served one
+        # after the other the barrier would time out.
+        barrier = threading.Barrier(2, timeout=5)
+        list_tags = TagViewset.list
+
+        def slow_list(viewset, request, *args, **kwargs):
+            barrier.wait()
+            return list_tags(viewset, request, *args, **kwargs)
+
+        await sync_to_async(Tag.objects.create)(user=self.user, name="Vegan")
+        view = async_read_view(TagViewset.as_view({"get": "list"}))
+        with patch.object(TagViewset, "list", slow_list):
+            responses = await asyncio.gather(
+                view(self.factory.get("/api/recipe/tags/", **self.headers)),
+                view(self.factory.get("/api/recipe/tags/", **self.headers)),
+            )
+
+        self.assertEqual([res.status_code for res in responses], [200, 200])
+
+    def test_patterns_wrap_read_routes(self):
+        """Test only the routes with a read action are replaced"""
+        patterns = async_read_patterns(router.urls)
+
+        wrapped = {
+            pattern.name
+            for pattern, original in zip(patterns, router.urls)
+            if pattern.callback is not original.callback
+        }
+        self.assertIn("recipe-list", wrapped)
+        self.assertIn("recipe-detail", wrapped)
+        self.assertIn("tag-list", wrapped)
+        self.assertNotIn("recipe-export", wrapped)
+        self.assertNotIn("recipe-bulk-create", wrapped)
+        for pattern in patterns:
+            if pattern.name in wrapped:
+                self.assertTrue(asyncio.iscoroutinefunction(pattern.callback))
+
+    async def test_thread_view(self):
+        """Test a thread view serves its requests on threads of its own"""
+        threads = set()
+        post = CreateTokenView.post
+
+        def recording_post(view, request, *args, **kwargs):
+            threads.add(threading.current_thread().name)
+            return post(view, request, *args, **kwargs)
+
+        view = async_thread_view(CreateTokenView.as_view(), max_threads=2)
+        request = self.factory.post(
+            "/api/user/token/",
+            json.dumps({"email": "user@example.com", "password": "testpass123"}),
+            content_type="application/json",
+        )
+        with patch.object(CreateTokenView, "post", recording_post):
+            res = await view(request)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIn("token", json.loads(res.content))
+        self.assertEqual(len(threads), 1)
+        self.assertTrue(threads.pop().startswith("CreateTokenView"))
@@ -0,0 +1,128 @@
+"""
+Tests for the cached token authentication.
+"""
+
+from unittest.mock import patch
+
+from core import authentication
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+ME_URL = reverse("user:me")
+
+
+def create_user(email="user@example.com", password="testpass123"):
+    """Create and return a new user"""
+    return get_user_model().objects.create_user(email, password, name="Test Name")
+
+
+class TTLCacheTests(SimpleTestCase):
+    """Test the in-process cache"""
+
+    def test_entries_expire(self):
+        """Test entries are dropped once their time to live passes"""
+        cache = authentication.TTLCache(max_size=10, ttl=60)
+        with patch("time.monotonic", return_value=100):
+            cache.set("key", "value")
+        with patch("time.monotonic", return_value=159):
+            self.assertEqual(cache.get("key"), "value")
+        with patch("time.monotonic", return_value=161):
+            self.assertIsNone(cache.get("key"))
+
+    def test_least_recently_used_evicted(self):
+        """Test the least recently used entry is evicted when full"""
+        cache = authentication.TTLCache(max_size=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual(len(cache), 2)
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test authenticating API requests with cached tokens"""
+
+    def setUp(self):
+        authentication.token_cache.clear()
+        self.user = create_user()
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_cached_token_skips_database(self):
+        """Test a known token is resolved without queries"""
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["email"], self.user.email)
+
+    def test_invalid_token_rejected(self):
+        """Test an unknown token is rejected"""
+        self.client.credentials(HTTP_AUTHORIZATION="Token invalid")
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_token_rejected(self):
+        """Test a token stops working once deleted"""
+        self.client.get(ME_URL)
+
+        self.token.delete()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        """Test a token stops working once its user is deactivated"""
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_user_update_refreshes_cache(self):
+        """Test changes made through the profile endpoint are seen afterwards"""
+        self.client.get(ME_URL)
+
+        res = self.client.patch(ME_URL, {"name": "Updated Name"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.data["name"], "Updated Name")
+
+    @override_settings(
+        TOKEN_AUTH_CACHE={
+            "MAX_SIZE": 10,
+            "TTL": 60,
+            "CACHE_ALIAS": "default",
+            "CACHE_TTL": 60,
+        }
+    )
+    def test_shared_cache_skips_database(self):
+        """Test tokens are resolved from the shared cache when configured"""
+        self.client.get(ME_URL)
+        # NOTE: Emulates another process, which only shares the Django cache.
+        authentication.token_cache.clear()
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.token.delete()
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
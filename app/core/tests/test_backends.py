@@ -0,0 +1,173 @@
+"""
+Tests for the PostgreSQL backend with health checks and pooling.
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from core.backends.postgresql.base import DatabaseWrapper
+from core.backends.postgresql.pool import (
+    ConnectionPool,
+    PoolTimeout,
+    close_idle_connections,
+)
+from django.db import connection
+from django.db.utils import OperationalError
+from django.test import SimpleTestCase, TestCase
+from psycopg2 import extensions
+
+
+class FakeConnection:
+    """Stand-in for a psycopg2 connection"""
+
+    def __init__(self):
+        self.closed = 0
+        self.info = SimpleNamespace(
+            transaction_status=extensions.TRANSACTION_STATUS_IDLE
+        )
+
+    def close(self):
+        self.closed = 1
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """Test the bounded connection pool"""
+
+    def test_connections_reused(self):
+        """Test a returned connection is handed out again"""
+        pool = ConnectionPool(max_size=2, timeout=1)
+        conn, reused = pool.getconn(FakeConnection)
+        self.assertFalse(reused)
+        pool.putconn(conn)
+
+        again, reused = pool.getconn(FakeConnection)
+
+        self.assertIs(again, conn)
+        self.assertTrue(reused)
+        self.assertEqual(
+            pool.stats(), {"size": 1, "idle": 0, "in_use": 1, "waiting": 0}
+        )
+
+    def test_full_pool_times_out(self):
+        """Test waiting for a connection fails once the timeout passes"""
+        pool = ConnectionPool(max_size=1, timeout=0.05)
+        pool.getconn(FakeConnection)
+
+        with self.assertRaises(PoolTimeout):
+            pool.getconn(FakeConnection)
+
+    def test_waiter_gets_returned_connection(self):
+        """Test a request waiting on a full pool gets the next returned connection"""
+        pool = ConnectionPool(max_size=1, timeout=5)
+        conn, _ = pool.getconn(FakeConnection)
+        result = []
+        waiter = threading.Thread(
+            target=lambda: result.append(pool.getconn(FakeConnection))
+        )
+        waiter.start()
+        while pool.stats()["waiting"] == 0:
+            time.sleep(0.001)
+
+        pool.putconn(conn)
+        waiter.join()
+
+        self.assertEqual(result, [(conn, True)])
+
+    def test_discarded_connection_frees_slot(self):
+        """Test discarding a connection closes it and lets a new one open"""
+        pool = ConnectionPool(max_size=1, timeout=0.05)
+        conn, _ = pool.getconn(FakeConnection)
+        pool.putconn(conn, discard=True)
+
+        new, reused = pool.getconn(FakeConnection)
+
+        self.assertTrue(conn.closed)
+        self.assertIsNot(new, conn)
+        self.assertFalse(reused)
+
+    def test_failed_connect_frees_slot(self):
+        """Test a connection that fails to open does not use up the pool"""
+        pool = ConnectionPool(max_size=1, timeout=0.05)
+
+        def fail():
+            raise OSError("refused")
+
+        with self.assertRaises(OSError):
+            pool.getconn(fail)
+
+        self.assertEqual(pool.stats()["size"], 0)
+
+    def test_connections_dropped_after_fork(self):
+        """Test a forked process does not reuse the connections of its parent"""
+        pool = ConnectionPool(max_size=1, timeout=0.05)
+        conn, _ = pool.getconn(FakeConnection)
+        pool.putconn(conn)
+
+        with patch("os.getpid", return_value=-1):
+            new, reused = pool.getconn(FakeConnection)
+
+        self.assertIsNot(new, conn)
+        self.assertFalse(reused)
+        self.assertFalse(conn.closed)
+
+
+class DatabaseWrapperTests(TestCase):
+    """Test the backend against the test database"""
+
+    def get_wrapper(self, **settings):
+        settings = {"CONN_HEALTH_CHECKS": False, "POOL": {}, **settings}
+        wrapper = DatabaseWrapper(
+            {**connection.settings_dict, **settings}, alias="test"
+        )
+        # NOTE: Cleanups run last in first out, the connection is returned to
+        # its pool before the idle ones are closed.
+        self.addCleanup(close_idle_connections)
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def get_backend_pid(self, wrapper):
+        with wrapper.cursor() as cursor:
+            cursor.execute("SELECT pg_backend_pid()")
+            return cursor.fetchone()[0]
+
+    def terminate_backend(self, pid):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_terminate_backend(%s)", [pid])
+            while True:
+                # NOTE: The statistics are otherwise read once per transaction.
+                cursor.execute("SELECT pg_stat_clear_snapshot()")
+                cursor.execute("SELECT 1 FROM pg_stat_activity WHERE pid = %s", [pid])
+                if cursor.fetchone() is None:
+                    break
+                time.sleep(0.01)
+
+    def test_pooled_connection_reused(self):
+        """Test closing a pooled connection returns it for the next request"""
+        wrapper = self.get_wrapper(POOL={"MAX_SIZE": 2, "TIMEOUT": 1})
+        pid = self.get_backend_pid(wrapper)
+        wrapper.close()
+
+        self.assertEqual(self.get_backend_pid(wrapper), pid)
+
+    def test_health_check_reconnects(self):
+        """Test a connection dropped by the server is replaced by the next request"""
+        wrapper = self.get_wrapper(CONN_MAX_AGE=None, CONN_HEALTH_CHECKS=True)
+        pid = self.get_backend_pid(wrapper)
+        self.terminate_backend(pid)
+
+        wrapper.close_if_unusable_or_obsolete()
+
+        self.assertNotEqual(self.get_backend_pid(wrapper), pid)
+
+    def test_without_health_check_request_fails(self):
+        """Test a dropped persistent connection fails the request by default"""
+        wrapper = self.get_wrapper(CONN_MAX_AGE=None)
+        pid = self.get_backend_pid(wrapper)
+        self.terminate_backend(pid)
+
+        wrapper.close_if_unusable_or_obsolete()
+
+        with self.assertRaises(OperationalError):
+            self.get_backend_pid(wrapper)
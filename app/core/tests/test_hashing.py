@@ -0,0 +1,121 @@
+"""
+Tests for the password hashing pool.
+"""
+
+import threading
+import time
+from unittest.mock import patch
+
+from core.hashing import HashingPool, HashingPoolFull, PooledPBKDF2PasswordHasher
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import (
+    PBKDF2PasswordHasher,
+    check_password,
+    make_password,
+)
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+TOKEN_URL = reverse("user:token")
+
+
+class BlockedPool:
+    """A pool whose workers are all held until release() is called"""
+
+    def __init__(self, workers, queue_size):
+        self.pool = HashingPool(workers, queue_size)
+        self.release_event = threading.Event()
+        self.threads = []
+
+    def block(self, count):
+        """Occupy count places of the pool from other threads, once they are in"""
+        for _ in range(count):
+            thread = threading.Thread(
+                target=self.pool.run, args=(self.release_event.wait, 5)
+            )
+            thread.start()
+            self.threads.append(thread)
+
+        deadline = time.monotonic() + 5
+        while self.pool.stats()["submitted"] < count:
+            assert time.monotonic() < deadline, "The pool was not occupied in time"
+            time.sleep(0.001)
+
+    def release(self):
+        self.release_event.set()
+        for thread in self.threads:
+            thread.join()
+
+
+class HashingPoolTests(SimpleTestCase):
+    """Test the bounded pool of hashing threads"""
+
+    def test_run_returns_result_and_counts(self):
+        """Test a function runs on a worker thread and is accounted for"""
+        pool = HashingPool(workers=2, queue_size=1)
+
+        name = pool.run(lambda: threading.current_thread().name)
+
+        self.assertTrue(name.startswith("password-hashing"))
+        stats = pool.stats()
+        self.assertEqual(stats["submitted"], 1)
+        self.assertEqual(stats["completed"], 1)
+        self.assertEqual(stats["running"], 0)
+        self.assertEqual(stats["queued"], 0)
+
+    def test_run_inline_without_workers(self):
+        """Test a pool without workers runs functions on the calling thread"""
+        pool = HashingPool(workers=0, queue_size=0)
+
+        name = pool.run(lambda: threading.current_thread().name)
+
+        self.assertEqual(name, threading.current_thread().name)
+
+    def test_full_pool_rejects(self):
+        """Test calls beyond the workers and the queue are rejected at once"""
+        blocked = BlockedPool(workers=1, queue_size=1)
+        self.addCleanup(blocked.release)
+        blocked.block(2)
+
+        with self.assertRaises(HashingPoolFull), self.assertLogs("core.hashing"):
+            blocked.pool.run(lambda: None)
+
+        stats = blocked.pool.stats()
+        self.assertEqual(stats["running"] + stats["queued"], 2)
+        self.assertEqual(stats["rejected"], 1)
+        blocked.release()
+        self.assertEqual(blocked.pool.stats()["completed"], 2)
+
+    def test_pooled_hasher_matches_pbkdf2(self):
+        """Test the pooled hasher reads and writes the same hashes as PBKDF2"""
+        pooled = PooledPBKDF2PasswordHasher()
+        plain = PBKDF2PasswordHasher()
+
+        encoded = make_password("secret", salt="salt1234", hasher="pbkdf2_sha256")
+
+        self.assertEqual(encoded, plain.encode("secret", "salt1234"))
+        self.assertEqual(encoded, pooled.encode("secret", "salt1234"))
+        self.assertTrue(check_password("secret", plain.encode("secret", "s4lt")))
+
+
+class HashingPoolApiTests(TestCase):
+    """Test the auth endpoints when the hashing pool is full"""
+
+    def test_token_rejected_with_retry_after(self):
+        """Test logins are answered 503 with Retry-After when the pool is full"""
+        get_user_model().objects.create_user("user@example.com", "testpass123")
+        blocked = BlockedPool(workers=1, queue_size=0)
+        self.addCleanup(blocked.release)
+        blocked.block(1)
+
+        with patch(
+            "core.hashing.get_hashing_pool", return_value=blocked.pool
+        ), self.assertLogs("core.hashing", "WARNING"):
+            res = APIClient().post(
+                TOKEN_URL, {"email": "user@example.com", "password": "testpass123"}
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(res["Retry-After"], "1")
@@ -6,7 +6,9 @@ from decimal import Decimal
 
 from core import models
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection
 from django.test import TestCase
+from recipe.filters import linked_to_recipe
 
 
 def create_user(email="user@example.com", password="testpassword123"):
@@ -92,3 +94,73 @@ class ModelTests(TestCase):
 
         self.assertEqual(str(ingredient), ingredient.name)
         self.assertEqual(ingredient.name, ingredient_name)
+
+
+class IndexUsageTests(TestCase):
+    """Test the planner uses the indexes matching the API's queries"""
+
+    def setUp(self):
+        self.user = create_user()
+        # NOTE: The test tables are tiny, so sequential scans would always win.
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def assertUsesIndex(self, queryset, index_name):
+        """Assert the plan of the queryset scans the given index"""
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+        self.assertNotIn("Sort", plan)
+
+    def test_recipe_list_uses_user_id_index(self):
+        """Test listing recipes scans the (user, id) index in order"""
+        queryset = models.Recipe.objects.filter(user=self.user).order_by("-id")
+
+        self.assertUsesIndex(queryset[:100], "core_recipe_user_id_idx")
+
+    def test_ingredient_list_uses_user_id_index(self):
+        """Test listing ingredients scans the (user, id) index in order"""
+        queryset = models.Ingredient.objects.filter(user=self.user).order_by("-id")
+
+        self.assertUsesIndex(queryset[:100], "core_ingredient_user_id_idx")
+
+    def test_tag_list_uses_unique_name_index(self):
+        """Test listing tags by name scans the unique (user, name) index"""
+        queryset = models.Tag.objects.filter(user=self.user).order_by("-name")
+
+        self.assertUsesIndex(queryset[:100], "core_tag_user_name_uniq")
+
+    def test_name_lookup_uses_unique_name_index(self):
+        """Test looking objects up by name uses the unique (user, name) index"""
+        for model, index_name in [
+            (models.Tag, "core_tag_user_name_uniq"),
+            (models.Ingredient, "core_ingredient_user_name_uniq"),
+        ]:
+            # NOTE: Without statistics the (user, recipe_count, id) index looks
+            # just as cheap, the names of a real user are far more selective.
+            model.objects.bulk_create(
+                model(user=self.user, name=f"Name {i}") for i in range(200)
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {model._meta.db_table}")
+            queryset = model.objects.filter(user=self.user, name__in=["a", "b"])
+
+            self.assertIn(index_name, queryset.explain())
+
+    def test_unused_filter_uses_link_index(self):
+        """Test the EXISTS over the links of a tag probes the (tag, recipe) index"""
+        queryset = models.Tag.objects.filter(user=self.user).filter(
+            ~linked_to_recipe(models.Tag)
+        )
+
+        plan = queryset.explain()
+        self.assertIn("Anti Join", plan)
+        self.assertIn("core_recipe_tags_tag_recipe_idx", plan)
+
+    def test_names_unique_per_user(self):
+        """Test two tags of the same user cannot share a name"""
+        other_user = create_user(email="other@example.com")
+        models.Tag.objects.create(user=self.user, name="Vegan")
+        models.Tag.objects.create(user=other_user, name="Vegan")
+
+        with self.assertRaises(IntegrityError):
+            models.Tag.objects.create(user=self.user, name="Vegan")
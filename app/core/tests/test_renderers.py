@@ -0,0 +1,100 @@
+"""
+Tests for the orjson renderer and parser.
+"""
+
+import datetime
+import io
+import uuid
+from decimal import Decimal
+
+from core.models import Recipe, Tag
+from core.renderers import ORJSONParser, ORJSONRenderer
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from recipe.serializers import RecipeSerializer
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    """Test the renderer produces the same bytes as DRF's"""
+
+    def assert_same_rendering(self, data, media_type=None):
+        self.assertEqual(
+            ORJSONRenderer().render(data, media_type),
+            JSONRenderer().render(data, media_type),
+        )
+
+    def test_same_output_as_json_renderer(self):
+        """Test native and converted types render like DRF's renderer"""
+        data = {
+            "price": Decimal("5.50"),
+            "created": timezone.now(),
+            "naive": datetime.datetime(2024, 1, 2, 3, 4, 5, 678901),
+            "day": datetime.date(2024, 1, 2),
+            "duration": datetime.timedelta(minutes=90),
+            "id": uuid.uuid4(),
+            "label": gettext_lazy("Tags"),
+            "text": "caf\u00e9 \u2028 \u2029 \U0001f60a \"quoted\"",
+            "numbers": [1, 2.5, -3, 10**18, True, None],
+            1: "int key",
+        }
+
+        self.assert_same_rendering(data)
+        self.assert_same_rendering([data, data])
+
+    def test_indented_output(self):
+        """Test indented responses are still rendered as requested"""
+        self.assert_same_rendering(
+            {"price": Decimal("1.25")}, "application/json; indent=4"
+        )
+
+    def test_none_renders_empty(self):
+        """Test no data renders an empty body"""
+        self.assertEqual(ORJSONRenderer().render(None), b"")
+
+
+class ORJSONParserTests(SimpleTestCase):
+    """Test the parser"""
+
+    def test_parse(self):
+        """Test a JSON body is parsed like DRF's parser"""
+        body = '{"title": "café", "price": "5.50", "tags": [{"name": "a"}]}'
+
+        self.assertEqual(
+            ORJSONParser().parse(io.BytesIO(body.encode())),
+            JSONParser().parse(io.BytesIO(body.encode())),
+        )
+
+    def test_invalid_json(self):
+        """Test invalid JSON raises a parse error"""
+        for body in (b"{", b'{"price": NaN}', b"\xff"):
+            with self.subTest(body=body):
+                with self.assertRaises(ParseError):
+                    ORJSONParser().parse(io.BytesIO(body))
+
+
+class RecipeRenderingTests(TestCase):
+    """Test recipe lists render identically with both renderers"""
+
+    def test_recipe_list_parity(self):
+        """Test serialized recipes render to the same bytes"""
+        user = get_user_model().objects.create_user("user@example.com", "pass1234")
+        tag = Tag.objects.create(user=user, name="Vegan")
+        for i in range(3):
+            recipe = Recipe.objects.create(
+                user=user,
+                title=f"Récipe {i}",
+                time_minutes=i,
+                price=Decimal("5.25") * i,
+            )
+            recipe.tags.add(tag)
+
+        data = RecipeSerializer(Recipe.objects.all(), many=True).data
+
+        self.assertEqual(
+            ORJSONRenderer().render(data), JSONRenderer().render(data)
+        )
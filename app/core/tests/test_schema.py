@@ -0,0 +1,73 @@
+"""
+Tests for the cached OpenAPI schema.
+"""
+
+import json
+import os
+import tempfile
+from unittest.mock import patch
+
+from core import schema
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from drf_spectacular.generators import SchemaGenerator
+from rest_framework import status
+
+SCHEMA_URL = reverse("api-schema")
+DOCS_URL = reverse("api-docs")
+
+
+class CachedSchemaTests(SimpleTestCase):
+    """Test the schema is generated once and served with an ETag"""
+
+    def setUp(self):
+        schema.clear_schema_cache()
+        self.addCleanup(schema.clear_schema_cache)
+
+    def test_schema_generated_once(self):
+        """Test the schema is only generated by the first request"""
+        get_schema = SchemaGenerator.get_schema
+        with patch.object(
+            SchemaGenerator, "get_schema", autospec=True, side_effect=get_schema
+        ) as mock_get_schema:
+            first = self.client.get(SCHEMA_URL, {"format": "json"})
+            second = self.client.get(SCHEMA_URL, {"format": "json"})
+            yaml = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(mock_get_schema.call_count, 1)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.content, second.content)
+        self.assertIn("/api/recipe/recipes/", json.loads(first.content)["paths"])
+        self.assertIn(b"/api/recipe/recipes/:", yaml.content)
+        self.assertNotEqual(first["ETag"], yaml["ETag"])
+
+    def test_matching_etag_not_modified(self):
+        """Test a request with the current ETag gets 304 without a body"""
+        res = self.client.get(SCHEMA_URL)
+
+        cached = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH=res["ETag"])
+        stale = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH='"stale"')
+
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(cached.content, b"")
+        self.assertEqual(cached["ETag"], res["ETag"])
+        self.assertEqual(stale.status_code, status.HTTP_200_OK)
+
+    def test_schema_read_from_file(self):
+        """Test a pregenerated schema file is served instead of generating one"""
+        document = {"openapi": "3.0.3", "info": {"title": "Pregenerated"}, "paths": {}}
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+            json.dump(document, f)
+        self.addCleanup(os.remove, f.name)
+
+        with override_settings(OPENAPI_SCHEMA_FILE=f.name):
+            res = self.client.get(SCHEMA_URL, {"format": "json"})
+
+        self.assertEqual(json.loads(res.content), document)
+
+    def test_docs_use_schema_url(self):
+        """Test the API docs load the cached schema"""
+        res = self.client.get(DOCS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn(SCHEMA_URL, res.content.decode())
@@ -0,0 +1,214 @@
+"""
+Tests for the signed access and refresh tokens.
+"""
+
+from unittest.mock import patch
+
+from core import signed_tokens
+from core.models import Recipe
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+SIGNED_TOKEN_URL = reverse("user:token-signed")
+REFRESH_URL = reverse("user:token-refresh")
+REVOKE_URL = reverse("user:token-revoke")
+ME_URL = reverse("user:me")
+RECIPES_URL = reverse("recipe:recipe-list")
+
+
+def create_user(email="user@example.com", password="testpass123"):
+    """Create and return a new user"""
+    return get_user_model().objects.create_user(email, password, name="Test Name")
+
+
+class SignedTokenTests(TestCase):
+    """Test issuing and verifying signed tokens"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user()
+
+    def test_verify_issued_token(self):
+        """Test an issued token is verified without queries"""
+        tokens = signed_tokens.issue_tokens(self.user)
+
+        with self.assertNumQueries(0):
+            claims = signed_tokens.verify_token(tokens["access"], signed_tokens.ACCESS)
+            user = signed_tokens.get_token_user(claims)
+
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(user.email, self.user.email)
+
+    def test_tampered_token_rejected(self):
+        """Test a token whose payload or signature changed is rejected"""
+        access = signed_tokens.issue_tokens(self.user)["access"]
+        payload, rest = access.split(":", 1)
+
+        with self.assertRaisesMessage(signed_tokens.InvalidToken, "Invalid token."):
+            signed_tokens.verify_token(f"{payload}x:{rest}", signed_tokens.ACCESS)
+
+    def test_wrong_type_rejected(self):
+        """Test a refresh token is not accepted as an access token"""
+        refresh = signed_tokens.issue_tokens(self.user)["refresh"]
+
+        with self.assertRaisesMessage(signed_tokens.InvalidToken, "Invalid token."):
+            signed_tokens.verify_token(refresh, signed_tokens.ACCESS)
+
+    def test_expired_token_rejected(self):
+        """Test a token is rejected once its lifetime passed"""
+        access = signed_tokens.issue_tokens(self.user)["access"]
+        claims = signed_tokens.verify_token(access, signed_tokens.ACCESS)
+
+        with patch("time.time", return_value=claims["exp"]):
+            with self.assertRaisesMessage(signed_tokens.InvalidToken, "expired"):
+                signed_tokens.verify_token(access, signed_tokens.ACCESS)
+
+    def test_revoked_token_rejected(self):
+        """Test a revoked token is rejected, and only that token"""
+        first = signed_tokens.issue_tokens(self.user)["access"]
+        second = signed_tokens.issue_tokens(self.user)["access"]
+
+        signed_tokens.revoke_token(
+            signed_tokens.verify_token(first, signed_tokens.ACCESS)
+        )
+
+        with self.assertRaisesMessage(signed_tokens.InvalidToken, "revoked"):
+            signed_tokens.verify_token(first, signed_tokens.ACCESS)
+        signed_tokens.verify_token(second, signed_tokens.ACCESS)
+
+    def test_password_change_revokes_tokens(self):
+        """Test the tokens issued before a password change are rejected"""
+        tokens = signed_tokens.issue_tokens(self.user)
+
+        self.user.set_password("newpass123")
+        self.user.save()
+
+        for token, token_type in [
+            (tokens["access"], signed_tokens.ACCESS),
+            (tokens["refresh"], signed_tokens.REFRESH),
+        ]:
+            with self.assertRaisesMessage(signed_tokens.InvalidToken, "revoked"):
+                signed_tokens.verify_token(token, token_type)
+        new_access = signed_tokens.issue_tokens(self.user)["access"]
+        signed_tokens.verify_token(new_access, signed_tokens.ACCESS)
+
+    def test_other_changes_keep_tokens(self):
+        """Test a profile change does not revoke the tokens"""
+        access = signed_tokens.issue_tokens(self.user)["access"]
+
+        self.user.name = "Other Name"
+        self.user.save()
+
+        signed_tokens.verify_token(access, signed_tokens.ACCESS)
+
+
+class SignedTokenApiTests(TestCase):
+    """Test the signed token endpoints and authentication"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user()
+        self.client = APIClient()
+
+    def obtain_tokens(self):
+        res = self.client.post(
+            SIGNED_TOKEN_URL, {"email": self.user.email, "password": "testpass123"}
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def test_obtain_tokens(self):
+        """Test a pair of tokens is issued for valid credentials"""
+        tokens = self.obtain_tokens()
+
+        self.assertIn("access", tokens)
+        self.assertIn("refresh", tokens)
+        self.assertEqual(tokens["expires_in"], 300)
+
+    def test_obtain_tokens_bad_credentials(self):
+        """Test no token is issued for invalid credentials"""
+        res = self.client.post(
+            SIGNED_TOKEN_URL, {"email": self.user.email, "password": "wrong"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn("access", res.data)
+
+    def test_bearer_token_skips_auth_queries(self):
+        """Test requests with an access token never query users or tokens"""
+        Recipe.objects.create(
+            user=self.user, title="Recipe", time_minutes=5, price="5.00"
+        )
+        access = self.obtain_tokens()["access"]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 1)
+        tables = " ".join(query["sql"] for query in context.captured_queries)
+        self.assertNotIn("core_user", tables)
+        self.assertNotIn("authtoken_token", tables)
+
+    def test_invalid_bearer_token_rejected(self):
+        """Test an invalid access token is answered 401"""
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer invalid")
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_me_with_bearer_token(self):
+        """Test the profile of the token user is loaded on demand"""
+        access = self.obtain_tokens()["access"]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+        with self.assertNumQueries(1):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["email"], self.user.email)
+        self.assertEqual(res.data["name"], "Test Name")
+
+    def test_refresh_rotates_tokens(self):
+        """Test a refresh token is traded for a new pair, and only once"""
+        tokens = self.obtain_tokens()
+
+        res = self.client.post(REFRESH_URL, {"refresh": tokens["refresh"]})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res.data["refresh"], tokens["refresh"])
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {res.data['access']}")
+        self.assertEqual(self.client.get(ME_URL).status_code, status.HTTP_200_OK)
+
+        res = self.client.post(REFRESH_URL, {"refresh": tokens["refresh"]})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_refresh_inactive_user_rejected(self):
+        """Test a refresh token of a deactivated user is rejected"""
+        refresh = self.obtain_tokens()["refresh"]
+        get_user_model().objects.filter(pk=self.user.pk).update(is_active=False)
+
+        res = self.client.post(REFRESH_URL, {"refresh": refresh})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_revoke_tokens(self):
+        """Test revoking rejects the refresh token and the access token sent"""
+        tokens = self.obtain_tokens()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+
+        res = self.client.post(REVOKE_URL, {"refresh": tokens["refresh"]})
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(res.data["detail"], "Token revoked.")
+        res = self.client.post(REFRESH_URL, {"refresh": tokens["refresh"]})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,161 @@
+"""
+Tests for the token bucket throttles.
+"""
+
+from unittest.mock import patch
+
+from core import throttling
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+RECIPES_URL = reverse("recipe:recipe-list")
+TOKEN_URL = reverse("user:token")
+SIGNED_TOKEN_URL = reverse("user:token-signed")
+
+
+def throttle_settings(cache_alias=None, recipes="1/s", login="1/min", burst=2):
+    """Return THROTTLING settings with small buckets"""
+    return {
+        "CACHE_ALIAS": cache_alias,
+        "MAX_KEYS": 100,
+        "SCOPES": {
+            "recipes": {"RATE": recipes, "BURST": burst},
+            "login": {"RATE": login, "BURST": burst},
+        },
+    }
+
+
+def create_user(email="user@example.com", password="testpass123"):
+    """Create and return a new user"""
+    return get_user_model().objects.create_user(email, password)
+
+
+class TokenBucketTests(SimpleTestCase):
+    """Test the token bucket arithmetic and storage"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_parse_rate(self):
+        """Test rates are converted to requests per second"""
+        self.assertEqual(throttling.parse_rate("20/s"), 20)
+        self.assertEqual(throttling.parse_rate("30/min"), 0.5)
+        self.assertEqual(throttling.parse_rate("7200/hour"), 2)
+
+    def test_take_token_refills(self):
+        """Test a bucket allows a burst, then refills at its rate"""
+        bucket = None
+        for now in [0, 0]:
+            bucket, wait = throttling.take_token(bucket, 0.5, 2, now)
+            self.assertEqual(wait, 0)
+
+        bucket, wait = throttling.take_token(bucket, 0.5, 2, 1)
+        self.assertEqual(wait, 1)
+        bucket, wait = throttling.take_token(bucket, 0.5, 2, 2)
+        self.assertEqual(wait, 0)
+        # NOTE: An idle bucket never holds more than its burst.
+        bucket, wait = throttling.take_token(bucket, 0.5, 2, 100)
+        self.assertEqual(bucket, (1, 100))
+
+    def test_local_buckets_evict(self):
+        """Test the least recently used buckets are dropped beyond the limit"""
+        buckets = throttling.LocalBuckets(max_size=2)
+        self.assertEqual(buckets.take("a", 1, 1), 0)
+        self.assertGreater(buckets.take("a", 1, 1), 0)
+        buckets.take("b", 1, 1)
+        buckets.take("c", 1, 1)
+
+        self.assertEqual(buckets.take("a", 1, 1), 0)
+
+    def test_shared_buckets_across_workers(self):
+        """Test workers sharing a cache share the buckets"""
+        first = throttling.SharedBuckets("default", max_size=10)
+        second = throttling.SharedBuckets("default", max_size=10)
+
+        self.assertEqual(first.take("key", 0.5, 2), 0)
+        self.assertEqual(second.take("key", 0.5, 2), 0)
+        self.assertGreater(first.take("key", 0.5, 2), 0)
+        self.assertGreater(second.take("key", 0.5, 2), 0)
+
+    def test_shared_buckets_blocked_locally(self):
+        """Test a waiting client is rejected without going to the cache"""
+        buckets = throttling.SharedBuckets("default", max_size=10)
+        buckets.take("key", 0.5, 1)
+        buckets.take("key", 0.5, 1)
+
+        with patch("core.throttling.caches") as caches:
+            wait = buckets.take("key", 0.5, 1)
+
+        self.assertGreater(wait, 0)
+        caches.__getitem__.assert_not_called()
+
+
+class TokenBucketThrottleApiTests(TestCase):
+    """Test the throttled API endpoints"""
+
+    def setUp(self):
+        cache.clear()
+        throttling.clear_buckets()
+        self.addCleanup(throttling.clear_buckets)
+        self.client = APIClient()
+
+    def test_recipes_throttled_per_user(self):
+        """Test a user beyond its burst is answered 429 with Retry-After"""
+        user = create_user()
+        other = create_user("other@example.com")
+        self.client.force_authenticate(user)
+
+        with override_settings(THROTTLING=throttle_settings()):
+            for _ in range(2):
+                res = self.client.get(RECIPES_URL)
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+            res = self.client.get(RECIPES_URL)
+            self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            self.assertEqual(res["Retry-After"], "1")
+
+            self.client.force_authenticate(other)
+            res = self.client.get(RECIPES_URL)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_login_throttled_per_ip(self):
+        """Test logins from an address share one bucket across token views"""
+        create_user()
+        payload = {"email": "user@example.com", "password": "testpass123"}
+
+        with override_settings(THROTTLING=throttle_settings()):
+            self.assertEqual(
+                self.client.post(TOKEN_URL, payload).status_code, status.HTTP_200_OK
+            )
+            self.assertEqual(
+                self.client.post(SIGNED_TOKEN_URL, payload).status_code,
+                status.HTTP_200_OK,
+            )
+            res = self.client.post(TOKEN_URL, payload)
+            self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            self.assertEqual(res["Retry-After"], "60")
+
+            res = self.client.post(TOKEN_URL, payload, REMOTE_ADDR="10.0.0.2")
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_shared_cache_mode(self):
+        """Test the buckets are kept in the cache when one is configured"""
+        user = create_user()
+        self.client.force_authenticate(user)
+
+        with override_settings(THROTTLING=throttle_settings("default")):
+            self.client.get(RECIPES_URL)
+
+        self.assertIsNotNone(cache.get(f"throttle:recipes:user:{user.pk}"))
+
+    def test_scope_without_rate_not_throttled(self):
+        """Test an empty rate disables the throttle of a scope"""
+        self.client.force_authenticate(create_user())
+
+        with override_settings(THROTTLING=throttle_settings(recipes="", burst=1)):
+            for _ in range(3):
+                res = self.client.get(RECIPES_URL)
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
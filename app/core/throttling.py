@@ -0,0 +1,191 @@
+"""
+Token bucket throttles for the API views
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+DURATIONS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+BUCKET_KEY = "throttle:{scope}:{ident}"
+
+_buckets = None
+_buckets_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate: str) -> float:
+    """Return the requests per second of a rate such as "20/s" or "10/min"."""
+    count, period = rate.split("/")
+    return int(count) / DURATIONS[period[0]]
+
+
+def take_token(bucket, rate: float, burst: int, now: float):
+    """
+    Take a token out of a bucket, after refilling it for the time elapsed.
+
+    :param bucket: The (tokens, time) of the bucket, None if it is full.
+    :param rate: The tokens added per second.
+    :param burst: The capacity of the bucket.
+    :param now: The current time, in seconds.
+    :return: The (tokens, time) of the bucket afterwards and the seconds to
+        wait for a token, 0 if one was taken.
+    """
+    tokens, updated = bucket or (burst, now)
+    tokens = min(burst, tokens + max(now - updated, 0) * rate)
+    if tokens >= 1:
+        return (tokens - 1, now), 0
+    return (tokens, now), (1 - tokens) / rate
+
+
+class _LRUDict:
+    """A dict dropping its least recently used keys beyond max_size."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._data = OrderedDict()
+
+    def get(self, key):
+        return self._data.get(key)
+
+    def set(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def delete(self, key):
+        self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class LocalBuckets:
+    """
+    Buckets kept in the memory of the process.
+
+    Taking a token costs a dict lookup under a lock, nothing leaves the
+    process. Each worker has buckets of its own, so a client spreading its
+    requests over N workers gets up to N times the rate. Beyond max_size the
+    least recently used buckets are dropped, they start full again.
+    """
+
+    def __init__(self, max_size: int):
+        self._buckets = _LRUDict(max_size)
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        """Take a token, return the seconds to wait for one or 0."""
+        now = time.monotonic()
+        with self._lock:
+            bucket, wait = take_token(self._buckets.get(key), rate, burst, now)
+            self._buckets.set(key, bucket)
+        return wait
+
+
+class SharedBuckets:
+    """
+    Buckets kept in a Django cache shared by the workers.
+
+    Taking a token costs a get and a set of the cache. Like the throttles of
+    DRF, the two are not atomic: requests of a client racing on different
+    workers may both take its last token. Once a client has to wait, the
+    worker remembers until when and rejects its requests meanwhile without
+    going to the cache, a runaway client costs the cache nothing.
+    """
+
+    def __init__(self, alias: str, max_size: int):
+        self.alias = alias
+        self._blocked = _LRUDict(max_size)
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        """Take a token, return the seconds to wait for one or 0."""
+        # NOTE: Wall clock time, the buckets are compared across processes.
+        now = time.time()
+        with self._lock:
+            blocked_until = self._blocked.get(key)
+            if blocked_until is not None:
+                if blocked_until > now:
+                    return blocked_until - now
+                self._blocked.delete(key)
+
+        cache = caches[self.alias]
+        bucket, wait = take_token(cache.get(key), rate, burst, now)
+        if wait:
+            # NOTE: Other workers can only drain the bucket further, it cannot
+            # have a token before then.
+            with self._lock:
+                self._blocked.set(key, now + wait)
+        else:
+            # NOTE: Once refilled the bucket is as good as missing.
+            timeout = math.ceil((burst - bucket[0]) / rate) + 1
+            cache.set(key, bucket, timeout=timeout)
+        return wait
+
+
+def get_buckets():
+    """Return the process wide buckets, creating them on first use."""
+    global _buckets
+    if _buckets is None:
+        options = settings.THROTTLING
+        with _buckets_lock:
+            if _buckets is None:
+                if options["CACHE_ALIAS"]:
+                    _buckets = SharedBuckets(
+                        options["CACHE_ALIAS"], options["MAX_KEYS"]
+                    )
+                else:
+                    _buckets = LocalBuckets(options["MAX_KEYS"])
+    return _buckets
+
+
+def clear_buckets():
+    """Forget every bucket of the process, e.g. after the settings changed."""
+    global _buckets
+    with _buckets_lock:
+        _buckets = None
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Throttle requests with a token bucket per client and endpoint.
+
+    The endpoint is the throttle_scope of the view, whose RATE and BURST come
+    from settings.THROTTLING["SCOPES"]. Views without a scope, or whose scope
+    has no rate, are not throttled. The client is the authenticated user,
+    whichever token it used, or else the IP address of the request.
+    """
+
+    def __init__(self):
+        self.wait_seconds = 0
+
+    def allow_request(self, request, view):
+        scope = getattr(view, "throttle_scope", None)
+        options = settings.THROTTLING["SCOPES"].get(scope)
+        if not options or not options["RATE"]:
+            return True
+
+        key = BUCKET_KEY.format(scope=scope, ident=self.get_client_ident(request))
+        self.wait_seconds = get_buckets().take(
+            key, parse_rate(options["RATE"]), options["BURST"]
+        )
+        return not self.wait_seconds
+
+    def get_client_ident(self, request) -> str:
+        """Return what identifies the client of a request."""
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            return f"user:{user.pk}"
+        return f"ip:{self.get_ident(request)}"
+
+    def wait(self):
+        # NOTE: Sent as the Retry-After header, rounded up, by DRF.
+        return self.wait_seconds
@@ -0,0 +1,80 @@
+"""
+Gunicorn configuration of the production server
+
+Loaded automatically by gunicorn from the app directory, every setting can be
+tuned from the environment:
+
+- GUNICORN_BIND: address to listen on, 0.0.0.0:8000 by default.
+- GUNICORN_WORKERS: worker processes, 2 x CPUs + 1 by default.
+- GUNICORN_THREADS: threads per worker, 4 by default.
+- GUNICORN_WORKER_CLASS: gthread by default. uvicorn.workers.UvicornWorker
+  serves app.asgi instead, with the async read views of core.async_views.
+- GUNICORN_TIMEOUT / GUNICORN_GRACEFUL_TIMEOUT: seconds before a silent worker
+  is killed, and given to the workers to finish their requests on shutdown.
+- GUNICORN_KEEPALIVE: seconds an idle keep-alive connection is held open.
+- GUNICORN_MAX_REQUESTS: requests after which a worker is replaced, with some
+  jitter so they are not all replaced at once, 0 disables it.
+
+The app is loaded once by the master before forking, the workers share its
+memory until they write to it. HUP replaces the workers gracefully, but keeps
+the preloaded code; a code change needs the master itself restarted, or USR2
+to start a new master followed by QUIT to the old one.
+"""
+
+import gc
+import multiprocessing
+import os
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+workers = _env_int('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1)
+threads = _env_int('GUNICORN_THREADS', 4)
+if 'uvicorn' in worker_class.lower():
+    wsgi_app = 'app.asgi:application'
+else:
+    wsgi_app = 'app.wsgi:application'
+
+preload_app = True
+
+timeout = _env_int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = _env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = _env_int('GUNICORN_KEEPALIVE', 5)
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = max_requests // 10
+
+# NOTE: The worker heartbeat files are written constantly, a memory backed
+# directory keeps them off the container's disk.
+worker_tmp_dir = '/dev/shm'
+
+accesslog = '-'
+errorlog = '-'
+
+
+def when_ready(server):
+    # NOTE: Generated in the master, the workers share the OpenAPI schema
+    # instead of each generating it on its first request.
+    from core.schema import get_schema
+
+    get_schema()
+
+    # NOTE: Moves the objects of the preloaded app out of the garbage
+    # collector's reach, collections in the workers would otherwise write to
+    # their pages and copy them.
+    gc.freeze()
+
+
+def pre_fork(server, worker):
+    # NOTE: Connections opened while loading the app must not be shared with
+    # the workers.
+    from django.db import connections
+
+    from core.backends.postgresql.pool import close_idle_connections
+
+    connections.close_all()
+    close_idle_connections()
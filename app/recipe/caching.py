@@ -0,0 +1,82 @@
+"""
+Conditional GET support for the recipe APIs
+"""
+
+import hashlib
+import uuid
+
+from django.core.cache import cache
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+COLLECTION_VERSION_KEY = "recipe:collection-version:{user_id}"
+
+
+def get_collection_version(user_id) -> str:
+    """
+    Return the version of the recipes, tags and ingredients of a user.
+
+    A missing version (never set or evicted from the cache) is replaced by a new
+    random one, so ETags issued before can never match again.
+    """
+    key = COLLECTION_VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        # NOTE: add() only sets the key if it is still missing, so concurrent
+        # readers settle on the same version.
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_collection_version(user_id):
+    """Invalidate every ETag issued for the collections of a user."""
+    key = COLLECTION_VERSION_KEY.format(user_id=user_id)
+    cache.set(key, uuid.uuid4().hex, timeout=None)
+
+
+class ConditionalGetMixin:
+    """
+    Answer list and retrieve requests with ETags derived from the user's version.
+
+    When the client sends a matching "If-None-Match" header the view replies
+    with 304 before the queryset or the serializer run at all.
+    """
+
+    def get_etag(self, request) -> str:
+        """Build the ETag of the current request."""
+        version = get_collection_version(request.user.pk)
+        # NOTE: The path includes the query string, so every page, filter and
+        # response format gets its own ETag.
+        parts = [
+            str(request.user.pk),
+            version,
+            request.get_full_path(),
+            request.accepted_media_type or "",
+        ]
+        digest = hashlib.sha1(":".join(parts).encode()).hexdigest()
+        return f'"{digest}"'
+
+    def _conditional_response(self, handler, request, *args, **kwargs):
+        """Return 304 if the client's copy is current, else run the handler."""
+        etag = self.get_etag(request)
+        if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+        if etag in if_none_match or "*" in if_none_match:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = handler(request, *args, **kwargs)
+
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response["ETag"] = etag
+            # NOTE: Responses are per user, shared caches must not reuse them.
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ["Authorization"])
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional_response(super().retrieve, request, *args, **kwargs)
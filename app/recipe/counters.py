@@ -0,0 +1,105 @@
+"""
+Maintenance of the recipe counts of tags and ingredients
+"""
+
+from collections import Counter
+
+from core.models import Recipe
+from django.db import connection
+from django.db.models import Count, F, Func, IntegerField, OuterRef, Subquery
+
+RELATED_FIELDS = ("tags", "ingredients")
+
+
+def get_recipe_field(model):
+    """Return the many to many field of Recipe pointing to model."""
+    for field_name in RELATED_FIELDS:
+        field = Recipe._meta.get_field(field_name)
+        if field.related_model is model:
+            return field
+    raise ValueError(f"Recipe has no recipe count for {model.__name__}")
+
+
+def get_link_counts(field, recipe_ids=None, related_ids=None) -> Counter:
+    """
+    Count the links of a many to many field of Recipe by tag or ingredient.
+
+    :param field: The tags or ingredients field of Recipe.
+    :param recipe_ids: Only count the links of these recipes, if given.
+    :param related_ids: Only count the links to these objects, if given.
+    :return: The number of links by primary key of the tag or ingredient.
+    """
+    source = f"{field.m2m_field_name()}_id"
+    target = f"{field.m2m_reverse_field_name()}_id"
+    links = field.remote_field.through.objects.all()
+    if recipe_ids is not None:
+        links = links.filter(**{f"{source}__in": recipe_ids})
+    if related_ids is not None:
+        links = links.filter(**{f"{target}__in": related_ids})
+    return Counter(
+        dict(
+            links.order_by()
+            .values(target)
+            .annotate(count=Count("*"))
+            .values_list(target, "count")
+        )
+    )
+
+
+def adjust_recipe_counts(model, deltas: dict):
+    """
+    Add the change of number of recipes to each tag or ingredient.
+
+    Every row is written by a single UPDATE, whatever the number of rows and
+    changes, so adding tags to many recipes at once takes one query.
+
+    :param model: Tag or Ingredient.
+    :param deltas: The change of number of recipes by primary key.
+    """
+    changes = sorted((pk, delta) for pk, delta in deltas.items() if delta)
+    if not changes:
+        return
+
+    ids, counts = zip(*changes)
+    table = model._meta.db_table
+    # NOTE: The count is incremented in place, so concurrent writers add up
+    # instead of overwriting each other. GREATEST keeps the column valid if it
+    # already drifted below the truth.
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {table} related
+            SET recipe_count = GREATEST(related.recipe_count + change.delta, 0)
+            FROM unnest(%s::bigint[], %s::integer[]) AS change (id, delta)
+            WHERE related.id = change.id
+            """,
+            [list(ids), list(counts)],
+        )
+
+
+def recipe_count_subquery(model):
+    """Return a subquery counting the recipes linked to the outer tag or ingredient."""
+    field = get_recipe_field(model)
+    target = f"{field.m2m_reverse_field_name()}_id"
+    # NOTE: COUNT without a GROUP BY always returns one row, 0 if there are no
+    # links, where an aggregate subquery would return NULL.
+    links = field.remote_field.through.objects.filter(**{target: OuterRef("pk")})
+    return Subquery(
+        links.order_by()
+        .annotate(count=Func(F("id"), function="COUNT"))
+        .values("count"),
+        output_field=IntegerField(),
+    )
+
+
+def refresh_recipe_counts(queryset) -> int:
+    """
+    Recount the recipes of the tags or ingredients of a queryset.
+
+    Only the rows whose count drifted are written.
+
+    :param queryset: Tags or ingredients, e.g. filtered by user.
+    :return: The number of rows that were corrected.
+    """
+    count = recipe_count_subquery(queryset.model)
+    return queryset.exclude(recipe_count=count).update(recipe_count=count)
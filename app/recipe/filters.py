@@ -0,0 +1,253 @@
+"""
+Filters for the recipe APIs
+"""
+
+from decimal import Decimal, InvalidOperation
+
+from core.models import Recipe
+from django.db import connection
+from django.db.models import Exists, OuterRef
+from recipe.counters import get_recipe_field
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+# NOTE: Upper bounds of the facet buckets, the last bucket is open ended.
+TIME_MINUTES_BUCKETS = (15, 30, 60, 120)
+PRICE_BUCKETS = (Decimal("5"), Decimal("10"), Decimal("20"), Decimal("50"))
+
+
+def _parse_ids(request, param: str) -> list:
+    """Parse a comma separated list of ids from the query string."""
+    value = request.query_params.get(param, "")
+    try:
+        return [int(item) for item in value.split(",") if item.strip()]
+    except ValueError:
+        raise ValidationError({param: "Must be a comma separated list of ids."})
+
+
+def _parse_number(request, param: str, parse):
+    """Parse a number from the query string, or return None if missing."""
+    value = request.query_params.get(param)
+    if value in (None, ""):
+        return None
+
+    try:
+        return parse(value)
+    except (ValueError, InvalidOperation):
+        raise ValidationError({param: "Must be a number."})
+
+
+def _parse_flag(request, param: str) -> bool:
+    """Parse a boolean flag from the query string, false if missing."""
+    value = request.query_params.get(param, "")
+    if value.lower() in ("", "0", "false", "no"):
+        return False
+    if value.lower() in ("1", "true", "yes"):
+        return True
+    raise ValidationError({param: "Must be a boolean."})
+
+
+def linked_to_recipe(model):
+    """Return an EXISTS condition on the links of a tag or ingredient to a recipe."""
+    field = get_recipe_field(model)
+    target = f"{field.m2m_reverse_field_name()}_id"
+    # NOTE: Served by the (tag, recipe) and (ingredient, recipe) indexes of the
+    # through tables, see core migration 0008_recipe_filter_indexes. The
+    # subquery stops at the first link instead of counting them.
+    return Exists(field.remote_field.through.objects.filter(**{target: OuterRef("pk")}))
+
+
+def _related_exists(field_name: str, ids: list):
+    """Return an EXISTS condition on the links of a recipe to any of the ids."""
+    field = Recipe._meta.get_field(field_name)
+    through = field.remote_field.through
+    return Exists(
+        through.objects.filter(
+            **{
+                f"{field.m2m_field_name()}_id": OuterRef("pk"),
+                f"{field.m2m_reverse_field_name()}_id__in": ids,
+            }
+        )
+    )
+
+
+class RecipeFilterBackend(BaseFilterBackend):
+    """
+    Filter recipes by tags, ingredients, preparation time and price.
+
+    Tags and ingredients match recipes linked to any of the given ids, through
+    EXISTS subqueries so the results never need to be made distinct.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        for field_name in ("tags", "ingredients"):
+            ids = _parse_ids(request, field_name)
+            if ids:
+                queryset = queryset.filter(_related_exists(field_name, ids))
+
+        ranges = [
+            ("time_minutes", int),
+            ("price", Decimal),
+        ]
+        for field_name, parse in ranges:
+            lower = _parse_number(request, f"{field_name}_min", parse)
+            if lower is not None:
+                queryset = queryset.filter(**{f"{field_name}__gte": lower})
+
+            upper = _parse_number(request, f"{field_name}_max", parse)
+            if upper is not None:
+                queryset = queryset.filter(**{f"{field_name}__lte": upper})
+
+        return queryset
+
+    def get_schema_operation_parameters(self, view):
+        def parameter(name, schema_type, description):
+            return {
+                "name": name,
+                "required": False,
+                "in": "query",
+                "description": description,
+                "schema": {"type": schema_type},
+            }
+
+        return [
+            parameter("tags", "string", "Comma separated list of tag ids."),
+            parameter("ingredients", "string", "Comma separated ingredient ids."),
+            parameter("time_minutes_min", "integer", "Minimum preparation time."),
+            parameter("time_minutes_max", "integer", "Maximum preparation time."),
+            parameter("price_min", "number", "Minimum price."),
+            parameter("price_max", "number", "Maximum price."),
+        ]
+
+
+class RecipeCountFilterBackend(BaseFilterBackend):
+    """
+    Filter tags or ingredients by their number of recipes.
+
+    The ranges read the maintained recipe_count column, so no links are joined.
+    "assigned_only" and "unused_only" check the links themselves, through EXISTS
+    subqueries, so they hold even if the counts drifted.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        assigned_only = _parse_flag(request, "assigned_only")
+        unused_only = _parse_flag(request, "unused_only")
+        if assigned_only and unused_only:
+            raise ValidationError(
+                {"unused_only": "Cannot be combined with assigned_only."}
+            )
+        if assigned_only:
+            queryset = queryset.filter(linked_to_recipe(queryset.model))
+        if unused_only:
+            queryset = queryset.filter(~linked_to_recipe(queryset.model))
+
+        lower = _parse_number(request, "recipe_count_min", int)
+        if lower is not None:
+            queryset = queryset.filter(recipe_count__gte=lower)
+
+        upper = _parse_number(request, "recipe_count_max", int)
+        if upper is not None:
+            queryset = queryset.filter(recipe_count__lte=upper)
+
+        return queryset
+
+    def get_schema_operation_parameters(self, view):
+        def parameter(name, schema_type, description):
+            return {
+                "name": name,
+                "required": False,
+                "in": "query",
+                "description": description,
+                "schema": {"type": schema_type},
+            }
+
+        return [
+            parameter("assigned_only", "boolean", "Only the ones used by a recipe."),
+            parameter("unused_only", "boolean", "Only the ones used by no recipe."),
+            parameter("recipe_count_min", "integer", "Minimum number of recipes."),
+            parameter("recipe_count_max", "integer", "Maximum number of recipes."),
+        ]
+
+
+def _buckets(bounds: tuple, counts: dict, format_bound=str) -> list:
+    """Build the list of range buckets from the counts per bucket index."""
+    lowers = (0,) + bounds
+    uppers = bounds + (None,)
+    return [
+        {
+            "min": format_bound(lower),
+            "max": None if upper is None else format_bound(upper),
+            "count": counts.get(index, 0),
+        }
+        for index, (lower, upper) in enumerate(zip(lowers, uppers))
+    ]
+
+
+def get_recipe_facets(queryset) -> dict:
+    """
+    Count the recipes of a queryset per tag, ingredient, time and price bucket.
+
+    Every facet is computed by a single aggregate query over the filtered
+    recipes, rather than one query per facet.
+    """
+    filtered = queryset.order_by().values("id", "time_minutes", "price")
+    filtered_sql, filtered_params = filtered.query.sql_with_params()
+
+    related_selects = []
+    for field_name in ("tags", "ingredients"):
+        field = Recipe._meta.get_field(field_name)
+        through_table = field.remote_field.through._meta.db_table
+        related_table = field.related_model._meta.db_table
+        source = f"{field.m2m_field_name()}_id"
+        target = f"{field.m2m_reverse_field_name()}_id"
+        related_selects.append(
+            f"""
+            SELECT '{field_name}', related.id, related.name, COUNT(*)
+            FROM {through_table} link
+            JOIN filtered ON filtered.id = link.{source}
+            JOIN {related_table} related ON related.id = link.{target}
+            GROUP BY related.id, related.name
+            """
+        )
+
+    # NOTE: width_bucket returns how many of the bounds are lower or equal to the
+    # value, i.e. the index of its bucket.
+    bucket_selects = [
+        f"""
+        SELECT '{field_name}', width_bucket({field_name}, %s), NULL, COUNT(*)
+        FROM filtered
+        GROUP BY 2
+        """
+        for field_name in ("time_minutes", "price")
+    ]
+
+    sql = f"WITH filtered AS ({filtered_sql}) " + " UNION ALL ".join(
+        related_selects + bucket_selects
+    )
+    params = tuple(filtered_params) + (
+        list(TIME_MINUTES_BUCKETS),
+        list(PRICE_BUCKETS),
+    )
+
+    related = {"tags": [], "ingredients": []}
+    bucket_counts = {"time_minutes": {}, "price": {}}
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        for facet, key, name, count in cursor.fetchall():
+            if facet in related:
+                related[facet].append({"id": key, "name": name, "count": count})
+            else:
+                bucket_counts[facet][key] = count
+
+    for items in related.values():
+        items.sort(key=lambda item: (-item["count"], item["name"], item["id"]))
+
+    return {
+        **related,
+        "time_minutes": _buckets(TIME_MINUTES_BUCKETS, bucket_counts["time_minutes"]),
+        "price": _buckets(
+            PRICE_BUCKETS,
+            bucket_counts["price"],
+            format_bound=lambda bound: f"{bound:.2f}",
+        ),
+    }
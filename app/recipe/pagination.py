@@ -0,0 +1,69 @@
+"""
+Pagination for the recipe APIs
+"""
+
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination over the ordering of a viewset.
+
+    Each page is fetched with a "WHERE <ordering field> < <cursor>" filter on an
+    indexed column, so deep pages cost the same as the first one. Clients that
+    still expect the whole list can opt out with "?paginate=false".
+    """
+
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+    paginate_query_param = "paginate"
+    paginate_disabled_values = ("false", "0", "no")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Return a page of results, or None if the client opted out."""
+        paginate = request.query_params.get(self.paginate_query_param, "")
+        if paginate.lower() in self.paginate_disabled_values:
+            return None
+
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_ordering(self, request, queryset, view):
+        """Let the view pick the ordering, e.g. by relevance for searches."""
+        if hasattr(view, "get_pagination_ordering"):
+            return view.get_pagination_ordering()
+
+        return super().get_ordering(request, queryset, view)
+
+    def get_schema_operation_parameters(self, view):
+        """Document the opt-out parameter next to the cursor ones."""
+        parameters = super().get_schema_operation_parameters(view)
+        parameters.append(
+            {
+                "name": self.paginate_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Set to false to return the full list unpaginated.",
+                "schema": {"type": "boolean"},
+            }
+        )
+        return parameters
+
+
+class RecipePagination(KeysetPagination):
+    """Paginate recipes newest first."""
+
+    ordering = ("-id",)
+
+
+class TagPagination(KeysetPagination):
+    """Paginate tags by name, which is unique per user."""
+
+    ordering = ("-name",)
+
+
+class IngredientPagination(KeysetPagination):
+    """Paginate ingredients newest first."""
+
+    ordering = ("-id",)
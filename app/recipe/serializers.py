@@ -2,11 +2,49 @@
 Serializers for recipe APIs
 """
 
+from collections import Counter, defaultdict
+from functools import partial
+
 from core.models import Ingredient, Recipe, Tag
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.utils.functional import cached_property
+from recipe.caching import bump_collection_version
+from recipe.counters import adjust_recipe_counts
 from rest_framework import serializers
 
 
-class TagSerializer(serializers.ModelSerializer):
+class UniqueNameMixin:
+    """Reject names already used by another object of the authenticated user."""
+
+    def validate_name(self, value):
+        # NOTE: Nested in a recipe, an existing name means reusing that object,
+        # so the check only applies when the object itself is written.
+        if self.parent is not None:
+            return value
+
+        model = self.Meta.model
+        others = model.objects.filter(user=self.context["request"].user, name=value)
+        if self.instance is not None:
+            others = others.exclude(pk=self.instance.pk)
+        if others.exists():
+            raise serializers.ValidationError(
+                f"A {model._meta.verbose_name} with this name already exists."
+            )
+        return value
+
+
+class SelectableFieldsMixin:
+    """Keep only the fields named by the "fields" argument, if given."""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+
+class TagSerializer(UniqueNameMixin, serializers.ModelSerializer):
     """Serializer for tags."""
 
     class Meta:
@@ -15,7 +53,15 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_fields = ["id"]
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class TagDetailSerializer(TagSerializer):
+    """Serializer for the tag views, with the number of recipes of each tag"""
+
+    class Meta(TagSerializer.Meta):
+        fields = TagSerializer.Meta.fields + ["recipe_count"]
+        read_only_fields = TagSerializer.Meta.read_only_fields + ["recipe_count"]
+
+
+class IngredientSerializer(UniqueNameMixin, serializers.ModelSerializer):
     """Serializer for ingredients"""
 
     class Meta:
@@ -24,7 +70,73 @@ class IngredientSerializer(serializers.ModelSerializer):
         read_only_fields = ["id"]
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class IngredientDetailSerializer(IngredientSerializer):
+    """Serializer for the ingredient views, with the number of recipes"""
+
+    class Meta(IngredientSerializer.Meta):
+        fields = IngredientSerializer.Meta.fields + ["recipe_count"]
+        read_only_fields = IngredientSerializer.Meta.read_only_fields + [
+            "recipe_count"
+        ]
+
+
+class RecipeListSerializer(serializers.ListSerializer):
+    """Serializer for creating many recipes at once"""
+
+    @transaction.atomic
+    def create(self, validated_data):
+        """
+        Create every recipe with a fixed number of queries.
+
+        The recipes are written with one bulk insert, their tags and ingredients
+        are looked up or created together and all the through-table rows of each
+        relation are written with one more insert.
+        """
+        related_fields = ("tags", "ingredients")
+        nested = [
+            {field_name: attrs.pop(field_name, []) for field_name in related_fields}
+            for attrs in validated_data
+        ]
+        recipes = Recipe.objects.bulk_create(
+            [Recipe(**attrs) for attrs in validated_data]
+        )
+
+        for field_name in related_fields:
+            items = [item for links in nested for item in links[field_name]]
+            objs = {
+                obj.name: obj
+                for obj in self.child._get_or_create_named(items, field_name)
+            }
+
+            field = Recipe._meta.get_field(field_name)
+            through = field.remote_field.through
+            source_name = field.m2m_field_name()
+            target_name = field.m2m_reverse_field_name()
+            rows = []
+            for recipe, links in zip(recipes, nested):
+                names = dict.fromkeys(item["name"] for item in links[field_name])
+                rows.extend(
+                    through(**{source_name: recipe, target_name: objs[name]})
+                    for name in names
+                )
+            through.objects.bulk_create(rows)
+            # NOTE: bulk_create does not send m2m_changed either.
+            adjust_recipe_counts(
+                field.related_model,
+                Counter(getattr(row, f"{target_name}_id") for row in rows),
+            )
+
+        # NOTE: bulk_create does not send post_save, so the ETags of the user
+        # are invalidated here instead of by the signal handlers.
+        users = {recipe.user_id for recipe in recipes}
+        for user_id in users:
+            transaction.on_commit(partial(bump_collection_version, user_id))
+
+        prefetch_related_objects(recipes, *related_fields)
+        return recipes
+
+
+class RecipeSerializer(SelectableFieldsMixin, serializers.ModelSerializer):
     """Serializer for recipes"""
 
     tags = TagSerializer(many=True, required=False)
@@ -34,47 +146,113 @@ class RecipeSerializer(serializers.ModelSerializer):
         model = Recipe
         fields = ["id", "title", "time_minutes", "price", "link", "tags", "ingredients"]
         read_only_fields = ["id"]
+        list_serializer_class = RecipeListSerializer
 
-    def _get_or_create_tags(self, tags: dict, recipe: Recipe):
+    def _get_or_create_named(self, items: list, field_name: str) -> list:
         """
-        Handle getting or creating tags as needed.
+        Handle getting or creating the objects named by the nested items in bulk.
 
-        :param tags: The tags to either be created or returned.
-        :param recipe: A Recipe object to get or create the tags for.
-        :return
+        All existing objects are looked up in one query and the missing ones are
+        created in one bulk insert, so the cost does not grow with the number of
+        items.
+
+        :param items: The validated nested items, each one with a "name".
+        :param field_name: The name of the many to many field on Recipe.
+        :return: The objects, one per distinct name.
         """
         # NOTE: Extracting the authenticated user from the context.
         auth_user = self.context["request"].user
+        model = Recipe._meta.get_field(field_name).related_model
+
+        # NOTE: dict.fromkeys drops repeated names while keeping their order.
+        names = list(dict.fromkeys(item["name"] for item in items))
+        if not names:
+            return []
+
+        existing = model.objects.filter(user=auth_user, name__in=names)
+        objs = {obj.name: obj for obj in existing}
 
-        for tag in tags:
-            # NOTE: I assume, that the tag_obj is a more complete object that differs
-            # from tag, in that it, also, includes the id of the created tag
-            tag_obj, created = Tag.objects.get_or_create(
-                user=auth_user,
-                **tag,
+        missing = [name for name in names if name not in objs]
+        if missing:
+            # NOTE: The unique (user, name) constraint turns names inserted by a
+            # concurrent request into conflicts, which are ignored. The primary
+            # keys are not returned then, so the rows are read back instead.
+            model.objects.bulk_create(
+                [model(user=auth_user, name=name) for name in missing],
+                ignore_conflicts=True,
             )
-            recipe.tags.add(tag_obj)
-        # return recipe
+            created = model.objects.filter(user=auth_user, name__in=missing)
+            objs.update((obj.name, obj) for obj in created)
+
+        return [objs[name] for name in names]
+
+    def _set_related(
+        self, items: list, recipe: Recipe, field_name: str, replace: bool = False
+    ) -> list:
+        """
+        Link the objects named by the nested items to a recipe.
+
+        Only the through-table rows that change are written: missing links are
+        added in one bulk insert and, when replacing, stale links are removed in
+        one delete. The recipe counts of the objects are adjusted to match.
+
+        :param items: The validated nested items, each one with a "name".
+        :param recipe: The recipe the objects must be linked to.
+        :param field_name: The name of the many to many field on Recipe.
+        :param replace: Whether links not named by the items must be removed.
+        :return: The linked objects, one per distinct name.
+        """
+        related = self._get_or_create_named(items, field_name)
+
+        field = Recipe._meta.get_field(field_name)
+        through = field.remote_field.through
+        source_name = field.m2m_field_name()
+        target_name = field.m2m_reverse_field_name()
+        links = through.objects.filter(**{source_name: recipe})
+
+        wanted = {obj.id for obj in related}
+        current = set()
+        stale = set()
+        if replace:
+            current = set(links.values_list(f"{target_name}_id", flat=True))
+            stale = current - wanted
+            if stale:
+                links.filter(**{f"{target_name}_id__in": stale}).delete()
+
+        added = [obj for obj in related if obj.id not in current]
+        through.objects.bulk_create(
+            [through(**{source_name: recipe, target_name: obj}) for obj in added],
+            ignore_conflicts=True,
+        )
+        # NOTE: The through rows are written directly, so no m2m_changed signal
+        # maintains the recipe counts here.
+        deltas = {obj.id: 1 for obj in added}
+        deltas.update((pk, -1) for pk in stale)
+        adjust_recipe_counts(field.related_model, deltas)
+        return related
+
+    def _get_or_create_tags(self, tags: list, recipe: Recipe):
+        """
+        Handle getting or creating tags as needed.
+
+        :param tags: The tags to either be created or returned.
+        :param recipe: A Recipe object to get or create the tags for.
+        :return: The tags linked to the recipe.
+        """
+        return self._set_related(tags, recipe, "tags")
 
-    def _get_or_create_ingredients(self, ingredients: dict, recipe: Recipe):
+    def _get_or_create_ingredients(self, ingredients: list, recipe: Recipe):
         """
         Handle getting or creating ingredients as needed.
 
         :param ingredients: The ingredient to be link to the recipe, they will either
             be created or just retrieved.
         :param recipe: The recipe the ingredients must be linked to
-        :return
+        :return: The ingredients linked to the recipe.
         """
-        # NOTE: Extracting the authenticated user from the context.
-        auth_user = self.context["request"].user
-
-        for ingredient in ingredients:
-            ingr_obj, created = Ingredient.objects.get_or_create(
-                user=auth_user,
-                **ingredient,
-            )
-            recipe.ingredients.add(ingr_obj)
+        return self._set_related(ingredients, recipe, "ingredients")
 
+    @transaction.atomic
     def create(self, validated_data):
         """Overriding default 'create' method to support writing og tags array."""
         tags = validated_data.pop("tags", [])
@@ -88,6 +266,7 @@ class RecipeSerializer(serializers.ModelSerializer):
         # Does this function only have to return the object to be created?
         return recipe
 
+    @transaction.atomic
     def update(self, instance: Recipe, validated_data):
         """Update recipe."""
         # NOTE: tags must be None by default, because, None is returned if the "tags"
@@ -97,13 +276,13 @@ class RecipeSerializer(serializers.ModelSerializer):
         tags = validated_data.pop("tags", None)
         ingredients = validated_data.pop("ingredients", None)
 
+        # NOTE: Only the links that differ from the current ones are written,
+        # instead of clearing and re-adding every through row.
         if tags is not None:
-            instance.tags.clear()
-            self._get_or_create_tags(tags, instance)
+            self._set_related(tags, instance, "tags", replace=True)
 
         if ingredients is not None:
-            instance.ingredients.clear()
-            self._get_or_create_ingredients(ingredients, instance)
+            self._set_related(ingredients, instance, "ingredients", replace=True)
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
@@ -117,3 +296,135 @@ class RecipeDetailSerializer(RecipeSerializer):
 
     class Meta(RecipeSerializer.Meta):
         fields = RecipeSerializer.Meta.fields + ["description"]
+
+
+class RecipeValuesListSerializer(serializers.ListSerializer):
+    """Represent many recipe rows, loading their related objects in bulk"""
+
+    def to_representation(self, data):
+        rows = list(data)
+        recipe_ids = [row["id"] for row in rows]
+        related = {
+            field_name: self.child.get_related(field_name, recipe_ids)
+            for field_name in self.child.related_fields
+        }
+        return [self.child.to_representation(row, related) for row in rows]
+
+
+class RecipeValuesSerializer(serializers.BaseSerializer):
+    """
+    Read-only RecipeSerializer for rows of Recipe.objects.values().
+
+    Builds the same representation, in the same key order, without the per
+    field overhead of the nested model serializers. The tags and ingredients of
+    all the rows are read with one query per relation, like prefetch_related.
+    """
+
+    fields = [
+        name
+        for name in RecipeSerializer.Meta.fields
+        if name not in ("tags", "ingredients")
+    ]
+    related_fields = ("tags", "ingredients")
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # NOTE: The rows only need the values of the selected fields, and their
+        # id for the related objects.
+        if fields is not None:
+            self.fields = [name for name in self.fields if name in fields]
+            self.related_fields = tuple(
+                name for name in self.related_fields if name in fields
+            )
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        kwargs["child"] = cls(fields=kwargs.pop("fields", None))
+        return RecipeValuesListSerializer(*args, **kwargs)
+
+    def to_representation(self, instance, related=None):
+        """
+        Represent one row.
+
+        :param instance: A dict with the id and the values of every field in
+            `fields`.
+        :param related: The related objects by field name and recipe id, as
+            returned by get_related(), loaded for this row alone if omitted.
+        """
+        if related is None:
+            related = {
+                field_name: self.get_related(field_name, [instance["id"]])
+                for field_name in self.related_fields
+            }
+
+        data = {name: instance[name] for name in self.fields}
+        if "price" in data:
+            data["price"] = self.price_field.to_representation(data["price"])
+        for field_name in self.related_fields:
+            data[field_name] = related[field_name].get(instance["id"], [])
+        return data
+
+    @cached_property
+    def price_field(self):
+        # NOTE: Formats the prices exactly like RecipeSerializer does.
+        return RecipeSerializer().fields["price"]
+
+    @staticmethod
+    def get_related(field_name: str, recipe_ids: list) -> dict:
+        """
+        Load the related objects of the recipes, ordered by id.
+
+        :param field_name: The name of the many to many field on Recipe.
+        :param recipe_ids: The ids of the recipes.
+        :return: Lists of {"id", "name"} dicts by recipe id.
+        """
+        field = Recipe._meta.get_field(field_name)
+        source = f"{field.m2m_field_name()}_id"
+        target = field.m2m_reverse_field_name()
+        links = (
+            field.remote_field.through.objects.filter(**{f"{source}__in": recipe_ids})
+            .order_by(f"{target}_id")
+            .values_list(source, f"{target}_id", f"{target}__name")
+        )
+
+        related = defaultdict(list)
+        for recipe_id, related_id, name in links:
+            related[recipe_id].append({"id": related_id, "name": name})
+        return related
+
+
+class RelatedCountSerializer(serializers.Serializer):
+    """Serializer for a tag or an ingredient with its number of recipes"""
+
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    count = serializers.IntegerField()
+
+
+class DeletedCountSerializer(serializers.Serializer):
+    """Serializer for the number of objects deleted by a request"""
+
+    deleted = serializers.IntegerField()
+
+
+class BucketSerializer(serializers.Serializer):
+    """Serializer for a range of values with its number of recipes"""
+
+    min = serializers.CharField()
+    max = serializers.CharField(allow_null=True)
+    count = serializers.IntegerField()
+
+
+class RecipeStatsSerializer(serializers.Serializer):
+    """Serializer for the statistics of the recipes of a user"""
+
+    count = serializers.IntegerField()
+    average_price = serializers.DecimalField(
+        max_digits=7, decimal_places=2, allow_null=True
+    )
+    median_price = serializers.DecimalField(
+        max_digits=7, decimal_places=2, allow_null=True
+    )
+    time_minutes = BucketSerializer(many=True)
+    tags = RelatedCountSerializer(many=True)
+    ingredients = RelatedCountSerializer(many=True)
@@ -0,0 +1,65 @@
+"""
+Signal handlers for the recipe APIs
+"""
+
+from collections import Counter
+from functools import partial
+
+from core.models import Ingredient, Recipe, Tag
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from recipe.caching import bump_collection_version
+from recipe.counters import RELATED_FIELDS, adjust_recipe_counts, get_link_counts
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def bump_owner_collection_version(sender, instance, **kwargs):
+    """Invalidate the ETags of the owner of a changed object."""
+    # NOTE: The version is bumped once the transaction commits. Bumping before
+    # would let a concurrent reader pair the new version with the old rows.
+    transaction.on_commit(partial(bump_collection_version, instance.user_id))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def update_recipe_counts(sender, instance, action, reverse, pk_set, **kwargs):
+    """Keep the recipe counts in step with links changed through the managers."""
+    field_name = "ingredients" if sender is Recipe.ingredients.through else "tags"
+    field = Recipe._meta.get_field(field_name)
+    # NOTE: Django only reports the links it actually inserted on add, but all
+    # the requested ones on remove, so removed links are read before they go.
+    if action == "post_add":
+        if reverse:
+            deltas = {instance.pk: len(pk_set)}
+        else:
+            deltas = Counter(pk_set)
+    elif action in ("pre_remove", "pre_clear"):
+        if reverse:
+            links = get_link_counts(field, recipe_ids=pk_set, related_ids=[instance.pk])
+        else:
+            links = get_link_counts(field, recipe_ids=[instance.pk], related_ids=pk_set)
+        deltas = {pk: -count for pk, count in links.items()}
+    else:
+        return
+
+    adjust_recipe_counts(field.related_model, deltas)
+
+
+@receiver(pre_delete, sender=Recipe)
+def release_recipe_counts(sender, instance, **kwargs):
+    """Decrement the recipe counts of the tags and ingredients of a deleted recipe."""
+    # NOTE: The links are deleted with the recipe without any m2m_changed signal.
+    for field_name in RELATED_FIELDS:
+        field = Recipe._meta.get_field(field_name)
+        links = get_link_counts(field, recipe_ids=[instance.pk])
+        adjust_recipe_counts(
+            field.related_model, {pk: -count for pk, count in links.items()}
+        )
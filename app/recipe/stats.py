@@ -0,0 +1,57 @@
+"""
+Statistics of the recipes of a user
+"""
+
+from core.models import Recipe
+from django.core.cache import cache
+from django.db.models import Aggregate, Avg, Count, FloatField
+from recipe.caching import get_collection_version
+from recipe.filters import get_recipe_facets
+
+STATS_CACHE_KEY = "recipe:stats:{user_id}:{version}"
+# NOTE: Entries are keyed by the collection version, so a change of the recipes
+# makes them unreachable rather than stale. The timeout only reclaims them.
+STATS_CACHE_TIMEOUT = 60 * 60 * 24
+TOP_RELATED_COUNT = 10
+
+
+class Median(Aggregate):
+    """Median of an expression, interpolated by PostgreSQL."""
+
+    function = "PERCENTILE_CONT"
+    name = "Median"
+    output_field = FloatField()
+    template = "%(function)s(0.5) WITHIN GROUP (ORDER BY %(expressions)s)"
+
+
+def compute_recipe_stats(user_id) -> dict:
+    """
+    Compute the statistics of the recipes of a user.
+
+    Takes two aggregate queries whatever the number of recipes: one over the
+    recipes and one over the tag and ingredient links, shared with the facets.
+    """
+    recipes = Recipe.objects.filter(user_id=user_id)
+    stats = recipes.aggregate(
+        count=Count("id"),
+        average_price=Avg("price"),
+        median_price=Median("price"),
+    )
+
+    facets = get_recipe_facets(recipes)
+    stats["time_minutes"] = facets["time_minutes"]
+    for field_name in ("tags", "ingredients"):
+        stats[field_name] = facets[field_name][:TOP_RELATED_COUNT]
+    return stats
+
+
+def get_recipe_stats(user_id) -> dict:
+    """Return the statistics of the recipes of a user, computed once per change."""
+    key = STATS_CACHE_KEY.format(
+        user_id=user_id, version=get_collection_version(user_id)
+    )
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_recipe_stats(user_id)
+        cache.set(key, stats, timeout=STATS_CACHE_TIMEOUT)
+    return stats
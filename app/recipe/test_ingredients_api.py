@@ -1,12 +1,15 @@
-from core.models import Ingredient
+from decimal import Decimal
+
+from core.models import Ingredient, Recipe
 from django.contrib.auth import get_user_model
 from django.test import TestCase
 from django.urls import reverse
-from recipe.serializers import IngredientSerializer
+from recipe.serializers import IngredientDetailSerializer
 from rest_framework import status
 from rest_framework.test import APIClient
 
 INGREDIENTS_URL = reverse("recipe:ingredient-list")
+UNUSED_INGREDIENTS_URL = reverse("recipe:ingredient-delete-unused")
 
 
 def detail_url(ingredient_id):
@@ -58,10 +61,10 @@ class PrivateIngredientApiTests(TestCase):
         ingredients = Ingredient.objects.all().order_by("-name")
         # TODO: Find out the exact reason we have to go through the serializer to test
         # this.
-        serializer = IngredientSerializer(ingredients, many=True)
+        serializer = IngredientDetailSerializer(ingredients, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_ingredients_limited_to_user(self):
         """Test list of ingredients is limited to authenticated user."""
@@ -76,9 +79,9 @@ class PrivateIngredientApiTests(TestCase):
         res = self.client.get(INGREDIENTS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]["id"], ingredient.id)
-        self.assertEqual(res.data[0]["name"], ingredient.name)
+        self.assertEqual(len(res.data["results"]), 1)
+        self.assertEqual(res.data["results"][0]["id"], ingredient.id)
+        self.assertEqual(res.data["results"][0]["name"], ingredient.name)
 
     def test_update_ingredient(self):
         """Test can update ingredient"""
@@ -105,3 +108,21 @@ class PrivateIngredientApiTests(TestCase):
         ingredients = Ingredient.objects.filter(user=self.user)
 
         self.assertFalse(ingredients.exists())
+
+    def test_filter_and_delete_unused_ingredients(self):
+        """Test listing the unused ingredients, then deleting them"""
+        salt = Ingredient.objects.create(user=self.user, name="Salt")
+        Ingredient.objects.create(user=self.user, name="Saffron")
+        recipe = Recipe.objects.create(
+            user=self.user, title="Soup", time_minutes=5, price=Decimal("1")
+        )
+        recipe.ingredients.add(salt)
+
+        res = self.client.get(INGREDIENTS_URL, {"unused_only": 1})
+        self.assertEqual([item["name"] for item in res.data["results"]], ["Saffron"])
+
+        res = self.client.delete(UNUSED_INGREDIENTS_URL)
+
+        self.assertEqual(res.data, {"deleted": 1})
+        res = self.client.get(INGREDIENTS_URL)
+        self.assertEqual([item["name"] for item in res.data["results"]], ["Salt"])
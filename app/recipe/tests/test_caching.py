@@ -0,0 +1,110 @@
+"""
+Tests for conditional GET on the recipe APIs
+"""
+
+from decimal import Decimal
+
+from core.models import Recipe, Tag
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+RECIPES_URL = reverse("recipe:recipe-list")
+TAGS_URL = reverse("recipe:tag-list")
+INGREDIENTS_URL = reverse("recipe:ingredient-list")
+
+
+def recipe_detail_url(recipe_id):
+    """Create and return a recipe detail URL"""
+    return reverse("recipe:recipe-detail", args=[recipe_id])
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe"""
+    defaults = {
+        "title": "Sample recipe title",
+        "time_minutes": 22,
+        "price": Decimal("5.25"),
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class ConditionalGetApiTests(TestCase):
+    """Test ETags and 304 responses on the recipe APIs"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_list_returns_etag(self):
+        """Test list endpoints return an ETag header"""
+        for url in (RECIPES_URL, TAGS_URL, INGREDIENTS_URL):
+            res = self.client.get(url)
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertIn("ETag", res)
+
+    def test_matching_etag_returns_not_modified_without_queries(self):
+        """Test a matching If-None-Match skips the query and serializer"""
+        create_recipe(user=self.user)
+        res = self.client.get(RECIPES_URL)
+        etag = res["ETag"]
+
+        with self.assertNumQueries(0):
+            res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], etag)
+        self.assertFalse(res.content)
+
+    def test_detail_matching_etag_returns_not_modified(self):
+        """Test the recipe detail answers 304 to a current ETag"""
+        recipe = create_recipe(user=self.user)
+        url = recipe_detail_url(recipe.id)
+        etag = self.client.get(url)["ETag"]
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_etag_changes_after_write(self):
+        """Test creating, updating or deleting objects invalidates ETags"""
+        recipe = create_recipe(user=self.user)
+        writes = [
+            lambda: create_recipe(user=self.user, title="Another recipe"),
+            lambda: Tag.objects.create(user=self.user, name="Vegan"),
+            lambda: recipe.tags.add(Tag.objects.create(user=self.user, name="Spicy")),
+            lambda: self.client.patch(recipe_detail_url(recipe.id), {"title": "New"}),
+            lambda: Tag.objects.filter(user=self.user).first().delete(),
+        ]
+
+        for write in writes:
+            etag = self.client.get(TAGS_URL)["ETag"]
+            with self.captureOnCommitCallbacks(execute=True):
+                write()
+
+            res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertNotEqual(res["ETag"], etag)
+
+    def test_etag_differs_per_user_and_query(self):
+        """Test ETags depend on the user and on the query string"""
+        other_user = get_user_model().objects.create_user(
+            email="other@example.com", password="testpass123"
+        )
+        etag = self.client.get(RECIPES_URL)["ETag"]
+
+        res = self.client.get(RECIPES_URL, {"page_size": 1}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.client.force_authenticate(other_user)
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
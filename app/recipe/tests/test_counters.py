@@ -0,0 +1,133 @@
+"""
+Tests for the recipe counts of tags and ingredients
+"""
+
+from decimal import Decimal
+
+from core.models import Ingredient, Recipe, Tag
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from recipe.counters import refresh_recipe_counts
+from rest_framework import status
+from rest_framework.test import APIClient
+
+RECIPES_URL = reverse("recipe:recipe-list")
+BULK_URL = reverse("recipe:recipe-bulk-create")
+
+
+def recipe_detail_url(recipe_id):
+    """Create and return a recipe detail URL"""
+    return reverse("recipe:recipe-detail", args=[recipe_id])
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe"""
+    defaults = {
+        "title": "Sample recipe title",
+        "time_minutes": 22,
+        "price": Decimal("5.25"),
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class RecipeCountTests(TestCase):
+    """Test the recipe counts follow every write of the links"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(self.user)
+
+    def assertCounts(self, model, expected):
+        """Assert the recipe counts of the user's objects by name"""
+        counts = model.objects.filter(user=self.user).values_list(
+            "name", "recipe_count"
+        )
+        self.assertEqual(dict(counts), expected)
+        # NOTE: A recount must find nothing to repair.
+        self.assertEqual(refresh_recipe_counts(model.objects.all()), 0)
+
+    def test_create_and_update_recipe(self):
+        """Test creating and updating recipes through the API"""
+        payload = {
+            "title": "Curry",
+            "time_minutes": 30,
+            "price": "7.50",
+            "tags": [{"name": "Dinner"}, {"name": "Thai"}],
+            "ingredients": [{"name": "Rice"}],
+        }
+        res = self.client.post(RECIPES_URL, payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        payload["tags"] = [{"name": "Dinner"}]
+        self.client.post(RECIPES_URL, payload, format="json")
+
+        res = self.client.patch(
+            recipe_detail_url(res.data["id"]),
+            {"tags": [{"name": "Lunch"}, {"name": "Dinner"}]},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertCounts(Tag, {"Dinner": 2, "Thai": 0, "Lunch": 1})
+        self.assertCounts(Ingredient, {"Rice": 2})
+
+    def test_bulk_create_recipes(self):
+        """Test creating many recipes at once"""
+        payload = [
+            {
+                "title": f"Recipe {i}",
+                "time_minutes": 10,
+                "price": "4.50",
+                "tags": [{"name": "Dinner"}, {"name": f"Tag {i}"}],
+            }
+            for i in range(3)
+        ]
+
+        res = self.client.post(BULK_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertCounts(Tag, {"Dinner": 3, "Tag 0": 1, "Tag 1": 1, "Tag 2": 1})
+
+    def test_delete_recipe(self):
+        """Test deleting a recipe releases its tags and ingredients"""
+        recipe = create_recipe(self.user)
+        other = create_recipe(self.user)
+        tag = Tag.objects.create(user=self.user, name="Dinner")
+        ingredient = Ingredient.objects.create(user=self.user, name="Salt")
+        for item in (recipe, other):
+            item.tags.add(tag)
+            item.ingredients.add(ingredient)
+
+        res = self.client.delete(recipe_detail_url(recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertCounts(Tag, {"Dinner": 1})
+        self.assertCounts(Ingredient, {"Salt": 1})
+
+    def test_related_managers(self):
+        """Test adding, removing and clearing links from either side"""
+        recipes = [create_recipe(self.user) for _ in range(3)]
+        dinner = Tag.objects.create(user=self.user, name="Dinner")
+        lunch = Tag.objects.create(user=self.user, name="Lunch")
+
+        recipes[0].tags.add(dinner, lunch)
+        recipes[0].tags.add(dinner)
+        lunch.recipe_set.add(*recipes)
+        self.assertCounts(Tag, {"Dinner": 1, "Lunch": 3})
+
+        recipes[0].tags.remove(dinner)
+        recipes[1].tags.remove(dinner)
+        lunch.recipe_set.remove(recipes[1])
+        self.assertCounts(Tag, {"Dinner": 0, "Lunch": 2})
+
+        recipes[0].tags.set([dinner])
+        self.assertCounts(Tag, {"Dinner": 1, "Lunch": 1})
+
+        lunch.recipe_set.clear()
+        recipes[0].tags.clear()
+        self.assertCounts(Tag, {"Dinner": 0, "Lunch": 0})
@@ -0,0 +1,130 @@
+"""
+Tests for filtering recipes and their facets
+"""
+
+from decimal import Decimal
+
+from core.models import Ingredient, Recipe, Tag
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+RECIPES_URL = reverse("recipe:recipe-list")
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe"""
+    defaults = {
+        "title": "Sample recipe title",
+        "time_minutes": 22,
+        "price": Decimal("5.25"),
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class RecipeFilterApiTests(TestCase):
+    """Test filtering recipes and counting facets"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(self.user)
+
+        self.vegan = Tag.objects.create(user=self.user, name="Vegan")
+        self.dinner = Tag.objects.create(user=self.user, name="Dinner")
+        self.rice = Ingredient.objects.create(user=self.user, name="Rice")
+
+        self.salad = create_recipe(
+            user=self.user, title="Salad", time_minutes=10, price=Decimal("4.00")
+        )
+        self.salad.tags.add(self.vegan)
+        self.risotto = create_recipe(
+            user=self.user, title="Risotto", time_minutes=45, price=Decimal("12.50")
+        )
+        self.risotto.tags.add(self.vegan, self.dinner)
+        self.risotto.ingredients.add(self.rice)
+        self.roast = create_recipe(
+            user=self.user, title="Roast", time_minutes=150, price=Decimal("60.00")
+        )
+        self.roast.tags.add(self.dinner)
+
+    def get_ids(self, params):
+        """List recipes and return their ids"""
+        res = self.client.get(RECIPES_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [recipe["id"] for recipe in res.data["results"]]
+
+    def test_filter_by_tags(self):
+        """Test filtering returns recipes with any of the tags, once each"""
+        ids = self.get_ids({"tags": f"{self.vegan.id},{self.dinner.id}"})
+
+        self.assertEqual(ids, [self.roast.id, self.risotto.id, self.salad.id])
+
+        ids = self.get_ids({"tags": f"{self.vegan.id}"})
+
+        self.assertEqual(ids, [self.risotto.id, self.salad.id])
+
+    def test_filter_by_ingredients(self):
+        """Test filtering recipes by ingredient"""
+        ids = self.get_ids({"ingredients": f"{self.rice.id}"})
+
+        self.assertEqual(ids, [self.risotto.id])
+
+    def test_filter_by_ranges(self):
+        """Test filtering recipes by time and price ranges"""
+        ids = self.get_ids({"time_minutes_min": 10, "time_minutes_max": 45})
+        self.assertEqual(ids, [self.risotto.id, self.salad.id])
+
+        ids = self.get_ids({"price_min": "5", "price_max": "100"})
+        self.assertEqual(ids, [self.roast.id, self.risotto.id])
+
+    def test_invalid_filter_returns_error(self):
+        """Test invalid filter values are rejected"""
+        for params in ({"tags": "a,b"}, {"price_min": "cheap"}):
+            res = self.client.get(RECIPES_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_facets_counted_in_one_query(self):
+        """Test facet counts are computed for the filtered recipes at once"""
+        # NOTE: The list itself takes three queries, recipes plus the two
+        # prefetched relations, every facet is counted by the fourth one.
+        with self.assertNumQueries(4):
+            res = self.client.get(RECIPES_URL, {"facets": "true", "price_max": "20"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        facets = res.data["facets"]
+
+        self.assertEqual(
+            facets["tags"],
+            [
+                {"id": self.vegan.id, "name": "Vegan", "count": 2},
+                {"id": self.dinner.id, "name": "Dinner", "count": 1},
+            ],
+        )
+        self.assertEqual(
+            facets["ingredients"], [{"id": self.rice.id, "name": "Rice", "count": 1}]
+        )
+        self.assertEqual(
+            [bucket["count"] for bucket in facets["time_minutes"]], [1, 0, 1, 0, 0]
+        )
+        self.assertEqual(
+            facets["price"][0], {"min": "0.00", "max": "5.00", "count": 1}
+        )
+        self.assertEqual(
+            [bucket["count"] for bucket in facets["price"]], [1, 0, 1, 0, 0]
+        )
+
+    def test_facets_on_unpaginated_list(self):
+        """Test facets are returned next to the full list"""
+        res = self.client.get(RECIPES_URL, {"facets": "true", "paginate": "false"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 3)
+        self.assertEqual(res.data["facets"]["price"][-1]["count"], 1)
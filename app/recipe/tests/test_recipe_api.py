@@ -2,17 +2,25 @@
 Tests for recipe APIs
 """
 
+import json
 from decimal import Decimal
+from unittest.mock import patch
 
 from core.models import Ingredient, Recipe, Tag
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Prefetch
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from recipe.serializers import RecipeDetailSerializer, RecipeSerializer
+from recipe.views import RecipeViewSet
 from rest_framework import status
 from rest_framework.test import APIClient
 
 RECIPES_URL = reverse("recipe:recipe-list")
+BULK_URL = reverse("recipe:recipe-bulk-create")
+EXPORT_URL = reverse("recipe:recipe-export")
 
 
 def detail_url(recipe_id):
@@ -73,7 +81,7 @@ class PrivateRecipeApiTests(TestCase):
         recipes = Recipe.objects.all().order_by("-id")
         serializer = RecipeSerializer(recipes, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_recipe_list_limited_to_user(self):
         """Test list of recipes is limited to authenticated user"""
@@ -87,7 +95,7 @@ class PrivateRecipeApiTests(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
         print(f"Autogenerated recipe-list endpoint: {RECIPES_URL}")
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_get_recipe_detail(self):
         """Test get recipe detail"""
@@ -359,3 +367,323 @@ class PrivateRecipeApiTests(TestCase):
         # in this case, much like in Spring Boot, by default, the nested tag objects
         # are loaded "Lazily" rather than "Eagerly".
         self.assertIn(new_ingredient, recipe.ingredients.all())
+
+    def test_list_recipes_query_count_is_constant(self):
+        """Test listing recipes does not issue queries per recipe"""
+        for i in range(5):
+            recipe = create_recipe(user=self.user, title=f"Recipe {i}")
+            recipe.tags.add(Tag.objects.create(user=self.user, name=f"Tag {i}"))
+            recipe.ingredients.add(
+                Ingredient.objects.create(user=self.user, name=f"Ingredient {i}")
+            )
+
+        # NOTE: One query for the recipes plus one per prefetched relation.
+        with self.assertNumQueries(3):
+            res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 5)
+        self.assertEqual(len(res.data["results"][0]["tags"]), 1)
+        self.assertEqual(len(res.data["results"][0]["ingredients"]), 1)
+
+    def test_list_recipes_same_bytes_as_recipe_serializer(self):
+        """Test the list renders exactly as RecipeSerializer would render it"""
+        tags = [Tag.objects.create(user=self.user, name=f"Tag {i}") for i in range(3)]
+        kale = Ingredient.objects.create(user=self.user, name="Kale")
+        for i, price in enumerate(["0.50", "12.00", "999.99"]):
+            recipe = create_recipe(
+                user=self.user,
+                title=f"Cr\u00e8me br\u00fbl\u00e9e \u2028 {i}",
+                price=Decimal(price),
+                link="" if i else "http://example.com",
+            )
+            recipe.tags.add(*reversed(tags[i:]))
+        recipe.ingredients.add(kale)
+
+        res = self.client.get(RECIPES_URL)
+
+        recipes = (
+            Recipe.objects.filter(user=self.user)
+            .order_by("-id")
+            .prefetch_related(
+                Prefetch("tags", queryset=Tag.objects.order_by("id")),
+                Prefetch("ingredients", queryset=Ingredient.objects.order_by("id")),
+            )
+        )
+        expected = dict(res.data)
+        expected["results"] = RecipeSerializer(recipes, many=True).data
+        self.assertEqual(res.content, res.accepted_renderer.render(expected))
+
+    def test_get_recipe_detail_query_count(self):
+        """Test retrieving a recipe loads its relations in fixed queries"""
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(Tag.objects.create(user=self.user, name="Dinner"))
+        recipe.tags.add(Tag.objects.create(user=self.user, name="Vegan"))
+        recipe.ingredients.add(Ingredient.objects.create(user=self.user, name="Kale"))
+
+        with self.assertNumQueries(3):
+            res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["tags"]), 2)
+        self.assertEqual(len(res.data["ingredients"]), 1)
+
+    def test_create_recipe_nested_query_count_is_constant(self):
+        """Test creating a recipe does not issue queries per nested item"""
+
+        def payload(count):
+            return {
+                "title": f"Recipe with {count} ingredients",
+                "time_minutes": 30,
+                "price": Decimal("7.00"),
+                "tags": [{"name": f"Tag {i}"} for i in range(count)],
+                "ingredients": [{"name": f"Ingredient {i}"} for i in range(count)],
+            }
+
+        with CaptureQueriesContext(connection) as few:
+            res = self.client.post(RECIPES_URL, payload(2), format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        with CaptureQueriesContext(connection) as many:
+            res = self.client.post(RECIPES_URL, payload(30), format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(len(few), len(many))
+        recipe = Recipe.objects.get(id=res.data["id"])
+        self.assertEqual(recipe.tags.count(), 30)
+        self.assertEqual(recipe.ingredients.count(), 30)
+
+    def test_create_recipe_with_repeated_ingredient(self):
+        """Test repeated nested names are linked to a single object"""
+        Ingredient.objects.create(user=self.user, name="Salt")
+        payload = {
+            "title": "Salted caramel",
+            "time_minutes": 30,
+            "price": Decimal("3.00"),
+            "ingredients": [{"name": "Salt"}, {"name": "Sugar"}, {"name": "Salt"}],
+        }
+
+        res = self.client.post(RECIPES_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe = Recipe.objects.get(id=res.data["id"])
+        self.assertEqual(recipe.ingredients.count(), 2)
+        self.assertEqual(Ingredient.objects.filter(user=self.user).count(), 2)
+
+    def test_update_tags_only_writes_changed_links(self):
+        """Test updating tags keeps the through rows of unchanged tags"""
+        tag_breakfast = Tag.objects.create(user=self.user, name="Breakfast")
+        tag_lunch = Tag.objects.create(user=self.user, name="Lunch")
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(tag_breakfast, tag_lunch)
+        through = Recipe.tags.through
+        kept_link = through.objects.get(recipe=recipe, tag=tag_breakfast)
+
+        payload = {"tags": [{"name": "Breakfast"}, {"name": "Brunch"}]}
+        res = self.client.patch(detail_url(recipe.id), payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(tag["name"] for tag in res.data["tags"]), ["Breakfast", "Brunch"]
+        )
+        self.assertTrue(through.objects.filter(id=kept_link.id).exists())
+        self.assertNotIn(tag_lunch, recipe.tags.all())
+        self.assertEqual(recipe.tags.count(), 2)
+
+    def test_update_ingredients_unchanged_writes_nothing(self):
+        """Test resending the same ingredients does not touch the through table"""
+        recipe = create_recipe(user=self.user)
+        recipe.ingredients.add(
+            Ingredient.objects.create(user=self.user, name="Rice"),
+            Ingredient.objects.create(user=self.user, name="Beans"),
+        )
+        payload = {"ingredients": [{"name": "Rice"}, {"name": "Beans"}]}
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.patch(detail_url(recipe.id), payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        through_table = Recipe.ingredients.through._meta.db_table
+        writes = [
+            query["sql"]
+            for query in queries
+            if through_table in query["sql"]
+            and query["sql"].startswith(("INSERT", "DELETE"))
+        ]
+        self.assertEqual(writes, [])
+        self.assertEqual(recipe.ingredients.count(), 2)
+
+    def test_list_recipes_paginated_by_cursor(self):
+        """Test the recipe list is split in pages followed by cursor"""
+        recipes = [
+            create_recipe(user=self.user, title=f"Recipe {i}") for i in range(5)
+        ]
+        expected_ids = [recipe.id for recipe in reversed(recipes)]
+
+        res = self.client.get(RECIPES_URL, {"page_size": 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ids = [recipe["id"] for recipe in res.data["results"]]
+        while res.data["next"]:
+            res = self.client.get(res.data["next"])
+            ids.extend(recipe["id"] for recipe in res.data["results"])
+
+        self.assertEqual(ids, expected_ids)
+
+    def test_list_recipes_unpaginated(self):
+        """Test clients can opt out of pagination to get the full list"""
+        create_recipe(user=self.user)
+        create_recipe(user=self.user)
+
+        res = self.client.get(RECIPES_URL, {"paginate": "false", "page_size": 1})
+
+        recipes = Recipe.objects.filter(user=self.user).order_by("-id")
+        serializer = RecipeSerializer(recipes, many=True)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, serializer.data)
+
+    def test_bulk_create_recipes(self):
+        """Test creating many recipes with nested objects in one request"""
+        Tag.objects.create(user=self.user, name="Dinner")
+
+        def recipe_payload(i):
+            return {
+                "title": f"Recipe {i}",
+                "time_minutes": 10 + i,
+                "price": "4.50",
+                "description": f"Description {i}",
+                "tags": [{"name": "Dinner"}, {"name": f"Tag {i}"}],
+                "ingredients": [{"name": "Salt"}, {"name": f"Ingredient {i}"}],
+            }
+
+        with CaptureQueriesContext(connection) as few:
+            res = self.client.post(BULK_URL, [recipe_payload(0)], format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        payload = [recipe_payload(i) for i in range(1, 4)]
+        with CaptureQueriesContext(connection) as many:
+            res = self.client.post(BULK_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(few), len(many))
+        self.assertEqual(
+            [item["title"] for item in res.data], ["Recipe 1", "Recipe 2", "Recipe 3"]
+        )
+        for item in res.data:
+            recipe = Recipe.objects.get(id=item["id"], user=self.user)
+            self.assertEqual(recipe.description, item["description"])
+            self.assertEqual(recipe.tags.count(), 2)
+            self.assertEqual(recipe.ingredients.count(), 2)
+        self.assertEqual(Tag.objects.filter(user=self.user, name="Dinner").count(), 1)
+        self.assertEqual(Ingredient.objects.filter(user=self.user).count(), 5)
+
+    def test_bulk_create_invalid_item_creates_nothing(self):
+        """Test one invalid recipe rejects the whole batch with per-item errors"""
+        payload = [
+            {"title": "Valid", "time_minutes": 10, "price": "4.50"},
+            {"title": "Invalid", "price": "4.50"},
+        ]
+
+        res = self.client.post(BULK_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn("time_minutes", res.data[1])
+        self.assertFalse(Recipe.objects.filter(user=self.user).exists())
+
+    def test_bulk_create_requires_list(self):
+        """Test the bulk endpoint rejects a single object"""
+        payload = {"title": "Single", "time_minutes": 10, "price": "4.50"}
+
+        res = self.client.post(BULK_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_recipes_as_ndjson(self):
+        """Test exporting every recipe as newline delimited JSON"""
+        other_user = create_user(email="other@example.com", password="password123")
+        create_recipe(user=other_user)
+        for i in range(5):
+            recipe = create_recipe(user=self.user, title=f"Recipe {i}")
+            recipe.tags.add(Tag.objects.create(user=self.user, name=f"Tag {i}"))
+
+        with patch.object(RecipeViewSet, "export_chunk_size", 2):
+            res = self.client.get(EXPORT_URL)
+            content = b"".join(res.streaming_content).decode()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        lines = content.splitlines()
+        recipes = Recipe.objects.filter(user=self.user).order_by("-id")
+        serializer = RecipeDetailSerializer(recipes, many=True)
+        self.assertEqual([json.loads(line) for line in lines], serializer.data)
+        self.assertEqual(lines[0].split(",")[0], f'{{"id":{recipes[0].id}')
+
+    def test_list_selected_fields(self):
+        """Test listing only the requested fields skips the relations"""
+        recipe = create_recipe(user=self.user, title="Soup")
+        recipe.tags.add(Tag.objects.create(user=self.user, name="Vegan"))
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(RECIPES_URL, {"fields": "title,id"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["results"], [{"id": recipe.id, "title": "Soup"}])
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("price", queries[0]["sql"])
+
+    def test_list_omitted_fields(self):
+        """Test omitted fields are left out of the list"""
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(Tag.objects.create(user=self.user, name="Vegan"))
+
+        res = self.client.get(RECIPES_URL, {"omit": "ingredients,link,price"})
+
+        self.assertEqual(
+            list(res.data["results"][0]), ["id", "title", "time_minutes", "tags"]
+        )
+        self.assertEqual(res.data["results"][0]["tags"][0]["name"], "Vegan")
+
+    def test_retrieve_selected_fields(self):
+        """Test the detail view loads and returns only the requested fields"""
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(Tag.objects.create(user=self.user, name="Vegan"))
+        url = detail_url(recipe.id)
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url, {"fields": "description,tags"})
+
+        tag = recipe.tags.get()
+        self.assertEqual(
+            res.data,
+            {
+                "tags": [{"id": tag.id, "name": "Vegan"}],
+                "description": recipe.description,
+            },
+        )
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn("link", queries[0]["sql"])
+
+    def test_unknown_selected_fields_rejected(self):
+        """Test selecting a field the endpoint does not have is an error"""
+        res = self.client.get(RECIPES_URL, {"fields": "title,description"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("fields", res.data)
+
+    def test_export_selected_fields(self):
+        """Test the export only writes the requested fields"""
+        recipe = create_recipe(user=self.user, title="Soup")
+
+        res = self.client.get(EXPORT_URL, {"omit": "tags,ingredients,link,price"})
+        content = b"".join(res.streaming_content).decode()
+
+        self.assertEqual(
+            json.loads(content),
+            {
+                "id": recipe.id,
+                "title": "Soup",
+                "time_minutes": recipe.time_minutes,
+                "description": recipe.description,
+            },
+        )
@@ -0,0 +1,99 @@
+"""
+Tests for searching recipes
+"""
+
+from decimal import Decimal
+
+from core.models import Recipe
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+RECIPES_URL = reverse("recipe:recipe-list")
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe"""
+    defaults = {
+        "title": "Sample recipe title",
+        "time_minutes": 22,
+        "price": Decimal("5.25"),
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class RecipeSearchApiTests(TestCase):
+    """Test full text search over recipes"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(self.user)
+
+    def search(self, text, **params):
+        """Search recipes and return the ids of all the result pages"""
+        res = self.client.get(RECIPES_URL, {"search": text, **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ids = [recipe["id"] for recipe in res.data["results"]]
+        while res.data["next"]:
+            res = self.client.get(res.data["next"])
+            ids.extend(recipe["id"] for recipe in res.data["results"])
+        return ids
+
+    def test_search_matches_title_and_description(self):
+        """Test search matches words in the title or the description"""
+        curry = create_recipe(user=self.user, title="Thai curry")
+        noodles = create_recipe(
+            user=self.user, title="Noodles", description="A mild curry sauce"
+        )
+        create_recipe(user=self.user, title="Porridge", description="Oats")
+
+        ids = self.search("curry")
+
+        # NOTE: Title matches weigh more than description matches.
+        self.assertEqual(ids, [curry.id, noodles.id])
+
+    def test_search_uses_stemming(self):
+        """Test search matches other forms of the same word"""
+        recipe = create_recipe(user=self.user, title="Baked potatoes")
+
+        self.assertEqual(self.search("potato bake"), [recipe.id])
+
+    def test_search_limited_to_user(self):
+        """Test search only returns recipes of the authenticated user"""
+        other_user = get_user_model().objects.create_user(
+            email="other@example.com", password="testpass123"
+        )
+        create_recipe(user=other_user, title="Lemon pie")
+        recipe = create_recipe(user=self.user, title="Lemon tart")
+
+        self.assertEqual(self.search("lemon"), [recipe.id])
+
+    def test_search_vector_follows_updates(self):
+        """Test the search index is kept up to date on write"""
+        recipe = create_recipe(user=self.user, title="Pancakes")
+
+        recipe.title = "Waffles"
+        recipe.save()
+        Recipe.objects.filter(id=recipe.id).update(price=Decimal("1.00"))
+
+        self.assertEqual(self.search("waffles"), [recipe.id])
+        self.assertEqual(self.search("pancakes"), [])
+
+    def test_search_results_paginated_by_rank(self):
+        """Test paging through ranked results returns each recipe once"""
+        recipes = [
+            create_recipe(user=self.user, title="Soup", description="soup " * i)
+            for i in range(5)
+        ]
+
+        ids = self.search("soup", page_size=2)
+
+        self.assertCountEqual(ids, [recipe.id for recipe in recipes])
+        self.assertEqual(len(ids), len(recipes))
@@ -0,0 +1,97 @@
+"""
+Tests for the recipe statistics API
+"""
+
+from decimal import Decimal
+
+from core.models import Ingredient, Recipe, Tag
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+STATS_URL = reverse("recipe:recipe-stats")
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe"""
+    defaults = {
+        "title": "Sample recipe title",
+        "time_minutes": 22,
+        "price": Decimal("5.25"),
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class RecipeStatsApiTests(TestCase):
+    """Test the statistics of the recipes of a user"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_stats(self):
+        """Test the statistics summarize the user's recipes only"""
+        other_user = get_user_model().objects.create_user(
+            email="other@example.com", password="testpass123"
+        )
+        create_recipe(other_user, price=Decimal("100.00"))
+        vegan = Tag.objects.create(user=self.user, name="Vegan")
+        dinner = Tag.objects.create(user=self.user, name="Dinner")
+        kale = Ingredient.objects.create(user=self.user, name="Kale")
+        for minutes, price in [(10, "2.00"), (25, "4.00"), (40, "9.00"), (200, "1.00")]:
+            recipe = create_recipe(self.user, time_minutes=minutes, price=price)
+            recipe.tags.add(vegan)
+            recipe.ingredients.add(kale)
+        recipe.tags.add(dinner)
+
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["count"], 4)
+        self.assertEqual(res.data["average_price"], "4.00")
+        self.assertEqual(res.data["median_price"], "3.00")
+        self.assertEqual(
+            [bucket["count"] for bucket in res.data["time_minutes"]], [1, 1, 1, 0, 1]
+        )
+        self.assertEqual(
+            res.data["tags"],
+            [
+                {"id": vegan.id, "name": "Vegan", "count": 4},
+                {"id": dinner.id, "name": "Dinner", "count": 1},
+            ],
+        )
+        self.assertEqual(
+            res.data["ingredients"], [{"id": kale.id, "name": "Kale", "count": 4}]
+        )
+
+    def test_stats_without_recipes(self):
+        """Test the statistics of a user without recipes"""
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["count"], 0)
+        self.assertIsNone(res.data["average_price"])
+        self.assertIsNone(res.data["median_price"])
+        self.assertEqual(res.data["tags"], [])
+
+    def test_stats_cached_until_recipes_change(self):
+        """Test the statistics are computed once, then again after a change"""
+        create_recipe(self.user)
+        self.client.get(STATS_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(STATS_URL)
+        self.assertEqual(res.data["count"], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_recipe(self.user)
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.data["count"], 2)
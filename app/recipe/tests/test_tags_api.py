@@ -2,15 +2,18 @@
 Test for the tags API
 """
 
-from core.models import Tag
+from decimal import Decimal
+
+from core.models import Recipe, Tag
 from django.contrib.auth import get_user_model
 from django.test import TestCase
 from django.urls import reverse
-from recipe.serializers import TagSerializer
+from recipe.serializers import TagDetailSerializer
 from rest_framework import status
 from rest_framework.test import APIClient
 
 TAGS_URL = reverse("recipe:tag-list")
+UNUSED_TAGS_URL = reverse("recipe:tag-delete-unused")
 
 
 def detail_url(tag_id):
@@ -54,10 +57,10 @@ class PrivateTagsApiTests(TestCase):
 
         tags = Tag.objects.all().order_by("-name")
 
-        serializer = TagSerializer(tags, many=True)
+        serializer = TagDetailSerializer(tags, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_tags_limited_to_user(self):
         """Tests list of tags is limited to authenticated user"""
@@ -68,9 +71,9 @@ class PrivateTagsApiTests(TestCase):
         res = self.client.get(TAGS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]["name"], tag.name)
-        self.assertEqual(res.data[0]["id"], tag.id)
+        self.assertEqual(len(res.data["results"]), 1)
+        self.assertEqual(res.data["results"][0]["name"], tag.name)
+        self.assertEqual(res.data["results"][0]["id"], tag.id)
 
     def test_update_tag(self):
         """Tests updating a tag."""
@@ -95,3 +98,116 @@ class PrivateTagsApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
         tags = Tag.objects.filter(user=self.user)
         self.assertFalse(tags.exists())
+
+    def test_tags_paginated_by_name(self):
+        """Tests paging through tags returns each tag once, by name"""
+        for name in ("Vegan", "Dessert", "Breakfast", "Spicy"):
+            Tag.objects.create(user=self.user, name=name)
+
+        res = self.client.get(TAGS_URL, {"page_size": 1})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ids = [tag["id"] for tag in res.data["results"]]
+        while res.data["next"]:
+            res = self.client.get(res.data["next"])
+            ids.extend(tag["id"] for tag in res.data["results"])
+
+        expected = Tag.objects.filter(user=self.user).order_by("-name")
+        self.assertEqual(ids, [tag.id for tag in expected])
+
+    def test_update_tag_to_existing_name_returns_error(self):
+        """Tests renaming a tag to a name already in use is rejected"""
+        Tag.objects.create(user=self.user, name="Dessert")
+        tag = Tag.objects.create(user=self.user, name="After Dinner")
+
+        res = self.client.patch(detail_url(tag.id), {"name": "Dessert"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        tag.refresh_from_db()
+        self.assertEqual(tag.name, "After Dinner")
+
+    def test_tags_ordered_by_recipe_count(self):
+        """Tests ordering tags by number of recipes, paging through ties"""
+        counts = {"Vegan": 2, "Dessert": 0, "Breakfast": 3, "Spicy": 2}
+        for name, count in counts.items():
+            tag = Tag.objects.create(user=self.user, name=name)
+            for _ in range(count):
+                recipe = Recipe.objects.create(
+                    user=self.user, title=name, time_minutes=5, price=Decimal("1")
+                )
+                recipe.tags.add(tag)
+
+        res = self.client.get(TAGS_URL, {"ordering": "-recipe_count", "page_size": 1})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        tags = list(res.data["results"])
+        while res.data["next"]:
+            res = self.client.get(res.data["next"])
+            tags.extend(res.data["results"])
+        self.assertEqual(
+            [(tag["name"], tag["recipe_count"]) for tag in tags],
+            [("Breakfast", 3), ("Spicy", 2), ("Vegan", 2), ("Dessert", 0)],
+        )
+
+    def test_filter_tags_by_recipe_count(self):
+        """Tests filtering tags by a range of number of recipes"""
+        Tag.objects.create(user=self.user, name="Unused")
+        Tag.objects.create(user=self.user, name="Popular", recipe_count=10)
+        Tag.objects.create(user=self.user, name="Used", recipe_count=2)
+
+        res = self.client.get(
+            TAGS_URL, {"recipe_count_min": 1, "recipe_count_max": 5}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([tag["name"] for tag in res.data["results"]], ["Used"])
+
+    def test_invalid_ordering_returns_error(self):
+        """Tests an unknown ordering is rejected"""
+        res = self.client.get(TAGS_URL, {"ordering": "name"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_tags_assigned_or_unused(self):
+        """Tests listing only the tags used by a recipe, or only the unused ones"""
+        used = Tag.objects.create(user=self.user, name="Used")
+        Tag.objects.create(user=self.user, name="Unused")
+        for _ in range(2):
+            recipe = Recipe.objects.create(
+                user=self.user, title="Soup", time_minutes=5, price=Decimal("1")
+            )
+            recipe.tags.add(used)
+
+        assigned = self.client.get(TAGS_URL, {"assigned_only": 1})
+        unused = self.client.get(TAGS_URL, {"unused_only": "true"})
+        both = self.client.get(TAGS_URL, {"assigned_only": 1, "unused_only": 1})
+
+        self.assertEqual([tag["name"] for tag in assigned.data["results"]], ["Used"])
+        self.assertEqual([tag["name"] for tag in unused.data["results"]], ["Unused"])
+        self.assertEqual(both.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_delete_unused_tags(self):
+        """Tests deleting the unused tags of the user with a single statement"""
+        used = Tag.objects.create(user=self.user, name="Used")
+        Tag.objects.create(user=self.user, name="Unused")
+        Tag.objects.create(user=self.user, name="Forgotten")
+        other_user = create_user(email="other@example.com")
+        other_tag = Tag.objects.create(user=other_user, name="Unused")
+        recipe = Recipe.objects.create(
+            user=self.user, title="Soup", time_minutes=5, price=Decimal("1")
+        )
+        recipe.tags.add(used)
+        etag = self.client.get(TAGS_URL)["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(1):
+            res = self.client.delete(UNUSED_TAGS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {"deleted": 2})
+        self.assertEqual(
+            list(Tag.objects.filter(user=self.user).values_list("name", flat=True)),
+            ["Used"],
+        )
+        self.assertTrue(Tag.objects.filter(id=other_tag.id).exists())
+        res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
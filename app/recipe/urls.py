@@ -2,6 +2,8 @@
 URL mapping for the recipe app
 """
 
+from core.async_views import async_read_patterns
+from django.conf import settings
 from django.urls import include, path
 from recipe import views
 from rest_framework.routers import DefaultRouter
@@ -11,8 +13,12 @@ router.register(r"recipes", views.RecipeViewSet)
 router.register(r"tags", views.TagViewset)
 router.register(r"ingredients", views.IngredientViewSet)
 
+routes = router.urls
+if settings.ASYNC_READ_VIEWS:
+    routes = async_read_patterns(routes)
+
 app_name = "recipe"
 
 urlpatterns = [
-    path("", include(router.urls)),
+    path("", include(routes)),
 ]
@@ -2,34 +2,248 @@
 Views for the recipe APIs
 """
 
+from functools import partial
+from itertools import islice
+
+from core.authentication import CachedTokenAuthentication, SignedTokenAuthentication
 from core.models import Ingredient, Recipe, Tag
+from core.renderers import dumps
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection, transaction
+from django.http import StreamingHttpResponse
+from django.db.models import (
+    F,
+    IntegerField,
+    Prefetch,
+    Value,
+    prefetch_related_objects,
+)
+from django.db.models.functions import Cast
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema, extend_schema_view
 from recipe import serializers
-from rest_framework import mixins, viewsets
-from rest_framework.authentication import TokenAuthentication
+from recipe.caching import ConditionalGetMixin, bump_collection_version
+from recipe.filters import (
+    RecipeCountFilterBackend,
+    RecipeFilterBackend,
+    get_recipe_facets,
+    linked_to_recipe,
+)
+from recipe.pagination import (
+    IngredientPagination,
+    RecipePagination,
+    TagPagination,
+)
+from recipe.stats import get_recipe_stats
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+# NOTE: Must match the text search configuration used by the trigger maintaining
+# Recipe.search_vector, see core migration 0007_recipe_search_vector.
+SEARCH_CONFIG = "english"
+SEARCH_RANK_SCALE = 1000000.0
+# NOTE: Upper bound on the recipes created by one bulk request, so a single
+# transaction never grows unbounded.
+BULK_CREATE_MAX_ITEMS = 1000
+# NOTE: Many to many fields of the recipe serializers, the other ones are columns.
+RELATED_FIELDS = ("tags", "ingredients")
+
+FIELDS_PARAMETERS = [
+    OpenApiParameter(
+        "fields",
+        OpenApiTypes.STR,
+        description="Comma separated fields to return, all of them by default.",
+    ),
+    OpenApiParameter(
+        "omit",
+        OpenApiTypes.STR,
+        description="Comma separated fields to leave out of the response.",
+    ),
+]
 
+# NOTE: Orderings of the tag and ingredient lists by number of recipes, the id
+# breaks the ties so the cursor pagination stays stable.
+RECIPE_COUNT_ORDERINGS = {
+    "recipe_count": ("recipe_count", "id"),
+    "-recipe_count": ("-recipe_count", "-id"),
+}
+RECIPE_COUNT_PARAMETERS = [
+    OpenApiParameter(
+        "ordering",
+        OpenApiTypes.STR,
+        enum=list(RECIPE_COUNT_ORDERINGS),
+        description="Order by number of recipes, most used first with "
+        "-recipe_count.",
+    ),
+]
 
-class RecipeViewSet(viewsets.ModelViewSet):
+
+@extend_schema_view(
+    retrieve=extend_schema(parameters=FIELDS_PARAMETERS),
+    list=extend_schema(
+        responses=serializers.RecipeSerializer(many=True),
+        parameters=FIELDS_PARAMETERS
+        + [
+            OpenApiParameter(
+                "search",
+                OpenApiTypes.STR,
+                description="Full text search over title and description, "
+                "results are ranked by relevance.",
+            ),
+            OpenApiParameter(
+                "facets",
+                OpenApiTypes.BOOL,
+                description="Include the recipe counts per tag, ingredient, "
+                "time and price bucket for the current filters.",
+            ),
+        ]
+    )
+)
+class RecipeViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """View to manage recipe APIs"""
 
     serializer_class = serializers.RecipeDetailSerializer
+    pagination_class = RecipePagination
+    filter_backends = [RecipeFilterBackend]
+    # NOTE: Recipes streamed by the export are fetched, prefetched and serialized
+    # this many at a time.
+    export_chunk_size = 1000
+    # NOTE: Actions whose response can be narrowed with "fields" and "omit".
+    selectable_fields_actions = ("list", "retrieve", "export")
     # NOTE: Read a bit more about queryset
     queryset = Recipe.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication, SignedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    # NOTE: Token bucket per user, see core.throttling.
+    throttle_scope = "recipes"
 
     def get_queryset(self):
         """Retrieve recipes for authenticated user"""
         # NOTE: This method needed to be overridden, in order
         # to filter the recipes by the authenticated user
-        return self.queryset.filter(user=self.request.user).order_by("-id")
+        queryset = self.queryset.filter(user=self.request.user)
+
+        search = self.request.query_params.get("search")
+        if search and self.action == "list":
+            query = SearchQuery(search, config=SEARCH_CONFIG, search_type="websearch")
+            # NOTE: The rank is scaled to an integer so the cursor pagination can
+            # compare it exactly, floats would not survive the round trip.
+            rank = SearchRank(F("search_vector"), query) * Value(SEARCH_RANK_SCALE)
+            queryset = queryset.filter(search_vector=query).annotate(
+                search_rank=Cast(rank, output_field=IntegerField())
+            )
+
+        ordering = self.get_pagination_ordering()
+        queryset = queryset.order_by(*ordering)
+        selected = self.get_selected_fields()
+        if self.action == "list":
+            # NOTE: Lists are read as plain rows, see RecipeValuesSerializer. The
+            # pagination reads the cursor position from the ordering fields.
+            fields = serializers.RecipeValuesSerializer.fields
+            if selected is not None:
+                fields = [name for name in fields if name in selected]
+            extra = ["id"] + [name.lstrip("-") for name in ordering]
+            return queryset.values(
+                *fields, *dict.fromkeys(name for name in extra if name not in fields)
+            )
+
+        if selected is not None:
+            queryset = queryset.only(
+                *[name for name in selected if name not in RELATED_FIELDS]
+            )
+        return queryset.prefetch_related(*self.get_related_lookups())
+
+    def get_related_lookups(self) -> list:
+        """Return the prefetch lookups of the relations in the response."""
+        # NOTE: The nested tag and ingredient serializers would otherwise issue
+        # two queries per recipe. Prefetching loads each relation for the whole
+        # page in a single extra query.
+        lookups = [
+            Prefetch("tags", queryset=Tag.objects.order_by("id")),
+            Prefetch("ingredients", queryset=Ingredient.objects.order_by("id")),
+        ]
+        selected = self.get_selected_fields()
+        if selected is None:
+            return lookups
+
+        return [lookup for lookup in lookups if lookup.prefetch_to in selected]
+
+    def get_selected_fields(self):
+        """
+        Return the fields selected with the "fields" and "omit" parameters.
+
+        :return: The names in serializer order, or None if the response is not
+            narrowed.
+        """
+        if self.action not in self.selectable_fields_actions:
+            return None
+        if not hasattr(self, "_selected_fields"):
+            self._selected_fields = self._parse_selected_fields()
+        return self._selected_fields
+
+    def _parse_selected_fields(self):
+        params = self.request.query_params
+        if "fields" not in params and "omit" not in params:
+            return None
+
+        if self.action == "list":
+            available = serializers.RecipeSerializer.Meta.fields
+        else:
+            available = self.serializer_class.Meta.fields
+        names = {}
+        for param in ("fields", "omit"):
+            items = (name.strip() for name in params.get(param, "").split(","))
+            names[param] = [name for name in items if name]
+            unknown = [name for name in names[param] if name not in available]
+            if unknown:
+                raise ValidationError({param: f"Unknown fields: {', '.join(unknown)}."})
+
+        fields = names["fields"] or available
+        return [
+            name for name in available if name in fields and name not in names["omit"]
+        ]
+
+    def get_serializer(self, *args, **kwargs):
+        """Narrow the serializer to the fields selected by the request"""
+        selected = self.get_selected_fields()
+        if selected is not None:
+            kwargs.setdefault("fields", selected)
+        return super().get_serializer(*args, **kwargs)
+
+    def get_pagination_ordering(self):
+        """Return the ordering of the recipe list, by relevance when searching"""
+        if self.action == "list" and self.request.query_params.get("search"):
+            return ("-search_rank", "-id")
+
+        return ("-id",)
+
+    def list(self, request, *args, **kwargs):
+        """List recipes, with the facet counts of the filtered set if requested"""
+        response = super().list(request, *args, **kwargs)
+
+        facets = request.query_params.get("facets", "")
+        if response.status_code == status.HTTP_200_OK and facets.lower() in (
+            "true",
+            "1",
+        ):
+            queryset = self.filter_queryset(self.get_queryset())
+            # NOTE: Unpaginated responses are plain lists, which have no room
+            # for the facets.
+            if isinstance(response.data, list):
+                response.data = {"results": response.data}
+            response.data["facets"] = get_recipe_facets(queryset)
+
+        return response
 
     def get_serializer_class(self):
         """Return the serializer class for request"""
         # NOTE: We override this method in order for it to address 2 endpoints
         # instead of just one. This way, the
         if self.action == "list":
-            return serializers.RecipeSerializer
+            return serializers.RecipeValuesSerializer
 
         return self.serializer_class
 
@@ -39,10 +253,141 @@ class RecipeViewSet(viewsets.ModelViewSet):
         # object.
         serializer.save(user=self.request.user)
 
+    @extend_schema(request=serializers.RecipeDetailSerializer(many=True))
+    @action(methods=["post"], detail=False, url_path="bulk")
+    def bulk_create(self, request):
+        """
+        Create a list of recipes in a single transaction.
+
+        Every recipe is validated first, if any of them is invalid nothing is
+        written and the response lists the errors of each item, in order.
+        Otherwise the created recipes are returned in the order they were sent.
+        """
+        if not isinstance(request.data, list):
+            raise ValidationError({"non_field_errors": ["Expected a list of recipes."]})
+        if len(request.data) > BULK_CREATE_MAX_ITEMS:
+            raise ValidationError(
+                {
+                    "non_field_errors": [
+                        f"At most {BULK_CREATE_MAX_ITEMS} recipes can be created "
+                        "at once."
+                    ]
+                }
+            )
+
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @extend_schema(
+        responses={(200, "application/x-ndjson"): OpenApiTypes.STR},
+        parameters=FIELDS_PARAMETERS,
+    )
+    @action(methods=["get"], detail=False)
+    def export(self, request):
+        """
+        Stream every recipe of the user as newline delimited JSON.
+
+        The recipes are read through a server-side cursor and serialized one
+        chunk at a time, so memory use does not depend on the number of recipes.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(
+            self._export_lines(queryset), content_type="application/x-ndjson"
+        )
+        response["Content-Disposition"] = 'attachment; filename="recipes.ndjson"'
+        return response
+
+    @extend_schema(responses=serializers.RecipeStatsSerializer)
+    @action(methods=["get"], detail=False)
+    def stats(self, request):
+        """
+        Summarize the recipes of the user.
+
+        Returns the number of recipes, their average and median price, how many
+        take each range of preparation time and the most used tags and
+        ingredients. Computed once per change of the user's recipes.
+        """
+        return self._conditional_response(self._stats_response, request)
+
+    def _stats_response(self, request):
+        stats = get_recipe_stats(request.user.pk)
+        return Response(serializers.RecipeStatsSerializer(stats).data)
+
+    def _export_lines(self, queryset):
+        """Yield the NDJSON lines of the recipes, one chunk at a time."""
+        # NOTE: iterator() ignores prefetch_related, so the relations are
+        # prefetched for every chunk by hand instead.
+        recipes = queryset.prefetch_related(None).iterator(
+            chunk_size=self.export_chunk_size
+        )
+        while True:
+            chunk = list(islice(recipes, self.export_chunk_size))
+            if not chunk:
+                break
+
+            prefetch_related_objects(chunk, *self.get_related_lookups())
+            serializer = self.get_serializer(chunk, many=True)
+            yield b"".join(dumps(item) + b"\n" for item in serializer.data)
+
+
+class RecipeCountOrderingMixin:
+    """Let tag and ingredient lists be ordered by their number of recipes."""
+
+    filter_backends = [RecipeCountFilterBackend]
+
+    def get_pagination_ordering(self):
+        """Return the ordering requested by "ordering", the default one if none"""
+        ordering = self.request.query_params.get("ordering")
+        if not ordering:
+            return self.pagination_class.ordering
+        if ordering not in RECIPE_COUNT_ORDERINGS:
+            raise ValidationError(
+                {"ordering": f"Must be one of {', '.join(RECIPE_COUNT_ORDERINGS)}."}
+            )
+
+        return RECIPE_COUNT_ORDERINGS[ordering]
+
+
+class DeleteUnusedMixin:
+    """Let tags and ingredients no recipe uses be deleted all at once."""
+
+    @extend_schema(request=None, responses=serializers.DeletedCountSerializer)
+    @action(methods=["delete"], detail=False, url_path="unused")
+    def delete_unused(self, request):
+        """
+        Delete the objects of the user that are not linked to any recipe.
+
+        Orphans have no links to cascade to, so they are deleted by a single
+        DELETE with a NOT EXISTS condition, rather than loaded and deleted one
+        by one with their signals.
+        """
+        model = self.queryset.model
+        orphans = model.objects.filter(user=request.user).filter(
+            ~linked_to_recipe(model)
+        )
+        ids_sql, params = orphans.values("pk").query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {model._meta.db_table} WHERE id IN ({ids_sql})", params
+            )
+            deleted = cursor.rowcount
+
+        # NOTE: No post_delete signal is sent, so the ETags of the user are
+        # invalidated here instead of by the signal handlers.
+        if deleted:
+            transaction.on_commit(partial(bump_collection_version, request.user.pk))
+        return Response({"deleted": deleted})
+
 
 # NOTE: Mixins must be defined before the 'main'/'base' class (GenericViewSet in this
 # case)
+@extend_schema_view(list=extend_schema(parameters=RECIPE_COUNT_PARAMETERS))
 class TagViewset(
+    ConditionalGetMixin,
+    RecipeCountOrderingMixin,
+    DeleteUnusedMixin,
     mixins.DestroyModelMixin,
     mixins.UpdateModelMixin,
     mixins.ListModelMixin,
@@ -50,22 +395,29 @@ class TagViewset(
 ):
     """Manage tags in the database."""
 
-    serializer_class = serializers.TagSerializer
+    serializer_class = serializers.TagDetailSerializer
+    pagination_class = TagPagination
     queryset = Tag.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication, SignedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
         """Overriding the DRF's default to scope it to the owner user"""
 
-        return self.queryset.filter(user=self.request.user).order_by("-name")
+        return self.queryset.filter(user=self.request.user).order_by(
+            *self.get_pagination_ordering()
+        )
 
     # def perform_create(self, serializer):
     #     """Create a new tag"""
     #     serializer.save(user=self.request.user)
 
 
+@extend_schema_view(list=extend_schema(parameters=RECIPE_COUNT_PARAMETERS))
 class IngredientViewSet(
+    ConditionalGetMixin,
+    RecipeCountOrderingMixin,
+    DeleteUnusedMixin,
     mixins.DestroyModelMixin,
     mixins.UpdateModelMixin,
     mixins.ListModelMixin,
@@ -73,13 +425,16 @@ class IngredientViewSet(
 ):
     """Manage ingredients in the database"""
 
-    serializer_class = serializers.IngredientSerializer
+    serializer_class = serializers.IngredientDetailSerializer
+    pagination_class = IngredientPagination
     queryset = Ingredient.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication, SignedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return self.queryset.filter(user=self.request.user).order_by("-id")
+        return self.queryset.filter(user=self.request.user).order_by(
+            *self.get_pagination_ordering()
+        )
 
     # def perform_create(self, serializer):
     #     """Create a new ingredient"""
@@ -10,6 +10,8 @@ from django.utils.translation import gettext as _
 
 from rest_framework import serializers
 
+from core.signed_tokens import REFRESH, InvalidToken, verify_token
+
 
 class UserSerializer(serializers.ModelSerializer):
     """ Serializer for the user object """
@@ -66,4 +68,38 @@ class AuthTokenSerializer(serializers.Serializer):
             raise serializers.ValidationError(msg, code='authorization')
 
         attrs['user'] = user
-        return attrs
\ No newline at end of file
+        return attrs
+
+
+class SignedTokensSerializer(serializers.Serializer):
+    """ Serializer for a pair of signed access and refresh tokens """
+    access = serializers.CharField(read_only=True)
+    refresh = serializers.CharField(read_only=True)
+    expires_in = serializers.IntegerField(
+        read_only=True, help_text='Lifetime of the access token, in seconds.'
+    )
+
+
+class RefreshTokenSerializer(serializers.Serializer):
+    """ Serializer for a signed refresh token """
+    refresh = serializers.CharField()
+
+    def validate(self, attrs):
+        """ Validate the refresh token and load its user """
+        try:
+            claims = verify_token(attrs['refresh'], REFRESH)
+        except InvalidToken as error:
+            raise serializers.ValidationError(str(error), code='authorization')
+
+        # NOTE: Unlike the access tokens, a refresh is rare enough to check the
+        # user is still there and active.
+        user = get_user_model().objects.filter(
+            pk=claims['uid'], is_active=True
+        ).first()
+        if user is None:
+            msg = _('User inactive or deleted.')
+            raise serializers.ValidationError(msg, code='authorization')
+
+        attrs['claims'] = claims
+        attrs['user'] = user
+        return attrs
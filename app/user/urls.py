@@ -2,8 +2,10 @@
 URL mappings for the user API
 """
 
+from django.conf import settings
 from django.urls import path
 
+from core.async_views import async_thread_view
 from user import views
 
 
@@ -11,8 +13,36 @@ from user import views
 # can find its target
 app_name = 'user'
 
+create_user_view = views.CreateUserView.as_view()
+create_token_view = views.CreateTokenView.as_view()
+create_signed_tokens_view = views.CreateSignedTokensView.as_view()
+# NOTE: The views checking passwords wait on the password hashing pool, under
+# ASGI they do so on threads of their own rather than on the ones of the other
+# views. Twice the places of the pool, so the requests beyond them are rejected
+# quickly instead of waiting for a thread.
+if settings.ASYNC_READ_VIEWS:
+    auth_threads = 2 * (
+        settings.PASSWORD_HASHING['WORKERS'] + settings.PASSWORD_HASHING['QUEUE_SIZE']
+    )
+    create_user_view = async_thread_view(create_user_view, max(auth_threads, 1))
+    create_token_view = async_thread_view(create_token_view, max(auth_threads, 1))
+    create_signed_tokens_view = async_thread_view(
+        create_signed_tokens_view, max(auth_threads, 1)
+    )
+
 urlpatterns = [
-    path('create/', views.CreateUserView.as_view(), name='create'),
-    path('token/', views.CreateTokenView.as_view(), name='token'),
+    path('create/', create_user_view, name='create'),
+    path('token/', create_token_view, name='token'),
+    path('token/signed/', create_signed_tokens_view, name='token-signed'),
+    path(
+        'token/refresh/',
+        views.RefreshSignedTokensView.as_view(),
+        name='token-refresh',
+    ),
+    path(
+        'token/revoke/',
+        views.RevokeSignedTokensView.as_view(),
+        name='token-revoke',
+    ),
     path('me/', views.ManageUserView.as_view(), name='me'),
 ]
\ No newline at end of file
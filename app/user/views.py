@@ -2,13 +2,23 @@
 Views for the user API
 """
 
-from rest_framework import generics, authentication, permissions
+from django.contrib.auth import get_user_model
+from drf_spectacular.utils import extend_schema
+from rest_framework import generics, permissions, status
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
 
+from core import signed_tokens
+from core.authentication import (
+    CachedTokenAuthentication,
+    SignedTokenAuthentication,
+)
 from user.serializers import (
     UserSerializer,
     AuthTokenSerializer,
+    RefreshTokenSerializer,
+    SignedTokensSerializer,
 )
 
 
@@ -21,13 +31,78 @@ class CreateTokenView(ObtainAuthToken):
     """ Create a new auth token for user """
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    # NOTE: Token bucket per IP address, shared with the signed tokens,
+    # checked before any password is hashed. See core.throttling.
+    # ObtainAuthToken turns the default throttles off.
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES
+    throttle_scope = 'login'
+
+
+class CreateSignedTokensView(generics.GenericAPIView):
+    """ Create a pair of signed access and refresh tokens for user
+
+    An alternative to CreateTokenView: the access token is verified without
+    any database query but expires after a few minutes, the refresh token
+    trades itself for a new pair until it expires too.
+    """
+    serializer_class = AuthTokenSerializer
+    permission_classes = [permissions.AllowAny]
+    throttle_scope = 'login'
+
+    @extend_schema(responses=SignedTokensSerializer)
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        tokens = signed_tokens.issue_tokens(serializer.validated_data['user'])
+        return Response(SignedTokensSerializer(tokens).data)
+
+
+class RefreshSignedTokensView(generics.GenericAPIView):
+    """ Trade a refresh token for a new pair of signed tokens """
+    serializer_class = RefreshTokenSerializer
+    permission_classes = [permissions.AllowAny]
+
+    @extend_schema(responses=SignedTokensSerializer)
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        # NOTE: Refresh tokens are single use, a stolen one stops working as
+        # soon as either party refreshes.
+        signed_tokens.revoke_token(serializer.validated_data['claims'])
+        tokens = signed_tokens.issue_tokens(serializer.validated_data['user'])
+        return Response(SignedTokensSerializer(tokens).data)
+
+
+class RevokeSignedTokensView(generics.GenericAPIView):
+    """ Revoke a refresh token, and the access token sent with the request """
+    serializer_class = RefreshTokenSerializer
+    authentication_classes = [SignedTokenAuthentication]
+    permission_classes = [permissions.AllowAny]
+
+    @extend_schema(responses={status.HTTP_204_NO_CONTENT: None})
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        signed_tokens.revoke_token(serializer.validated_data['claims'])
+        if isinstance(request.auth, dict):
+            signed_tokens.revoke_token(request.auth)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
     """ Manage the authenticated user """
     serializer_class = UserSerializer
-    authentication_classes = [ authentication.TokenAuthentication]
+    authentication_classes = [
+        CachedTokenAuthentication,
+        SignedTokenAuthentication,
+    ]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
         """ Retrieve and return the authenticated user """
-        return self.request.user
\ No newline at end of file
+        user = self.request.user
+        # NOTE: The users of signed tokens only carry their id, the other
+        # fields are loaded in one query rather than one per field.
+        if user.get_deferred_fields():
+            user = get_user_model().objects.get(pk=user.pk)
+        return user
\ No newline at end of file